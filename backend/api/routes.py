@@ -1,14 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import logging
 
-from ...services.qa import get_qa_response
+from ...services.qa import get_qa_response, stream_qa_response
 from ...services.summarizer import generate_daily_summary
+from ...services.ingest import run_ingestion
 from ...config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def _sse_frame(data: str, event: Optional[str] = None) -> str:
+    """Format a server-sent event, giving each line of the data its own data: field."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
 @router.get("/ask")
 async def ask_question(
     q: str = Query(..., description="The question to ask about your knowledge base"),
@@ -28,6 +36,28 @@ async def ask_question(
         logger.error(f"Error processing question: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ask/stream")
+async def ask_question_stream(
+    q: str = Query(..., description="The question to ask about your knowledge base"),
+    limit: int = Query(5, description="Maximum number of results to return"),
+):
+    """
+    Ask a question and stream the answer as server-sent events.
+    
+    Answer tokens are sent as default message events as soon as the LLM produces
+    them, followed by a final ``done`` event carrying the sources (or an ``error``
+    event). Disconnecting stops generation.
+    """
+    async def event_stream():
+        async for event, data in stream_qa_response(q, limit=limit):
+            yield _sse_frame(data, event=None if event == "token" else event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/summarize")
 async def trigger_summary():
     """
@@ -62,15 +92,15 @@ async def get_status():
     }
 
 @router.post("/ingest")
-async def ingest_notes():
+async def ingest_notes(background_tasks: BackgroundTasks):
     """
     Manually trigger ingestion of notes from the notes directory.
     
-    This will process all notes in the configured notes directory and add them
-    to the vector store.
+    This will process new and changed notes in the configured notes directory,
+    add them to the vector store and remove notes that no longer exist.
     """
     try:
-        # TODO: Implement actual ingestion logic
+        background_tasks.add_task(run_ingestion)
         return {"status": "ingestion started"}
     except Exception as e:
         logger.error(f"Error during ingestion: {str(e)}", exc_info=True)
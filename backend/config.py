@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,16 +15,37 @@ class Settings(BaseSettings):
     # Qdrant
     QDRANT_URL: str = "http://qdrant:6333"
     QDRANT_COLLECTION: str = "personal_knowledge"
+    QUANTIZATION: str = "scalar"  # "scalar", "binary" or "none"
+    QUANTIZATION_OVERSAMPLING: float = 2.0
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCT: int = 128
+    EF_SEARCH: int = 64
+    BATCH_WINDOW_MS: float = 5  # How long concurrent searches wait to be batched together
+    BATCH_MAX_SIZE: int = 32
     
     # LLM
     OLLAMA_BASE_URL: str = "http://host.docker.internal:11434"
-    MODEL_NAME: str = "gemma:3b"
+    MODEL_NAME: str = "gemma3:4b-it-q4_K_M"  # Explicit quantization tag; q8_0 if quality matters more than speed
+    OLLAMA_NUM_CTX: int = 8192  # Context window; must fit the summary prompt over all recent notes
+    OLLAMA_NUM_THREAD: Optional[int] = None  # CPU threads for generation; None lets Ollama use the physical cores
+    PREWARM_LLM: bool = True  # Load the model and cache the summary prompt prefix at startup
+    SUMMARY_CONCURRENCY: int = 4  # Concurrent per-note summaries; match Ollama's OLLAMA_NUM_PARALLEL
+    
+    # Semantic cache
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_SIZE: int = 1024
+    SEMANTIC_CACHE_TTL: int = 3600  # Seconds before a cached answer is considered stale
+    SUMMARY_CACHE_TTL: int = 86400  # Seconds a generated summary is reused for identical notes
     
     # Paths
     BASE_DIR: Path = Path(__file__).parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
     SUMMARIES_DIR: Path = DATA_DIR / "summaries"
     NOTES_DIR: Path = DATA_DIR / "notes"
+    MANIFEST_FILE: Path = DATA_DIR / "manifest.json"
+    CHUNK_STORE_DIR: Path = DATA_DIR / "chunks.lmdb"
+    CHUNK_STORE_MAP_SIZE: int = 10 * 1024 ** 3  # Maximum size of the chunk store in bytes
+    SUMMARY_CACHE_DIR: Path = DATA_DIR / "summary_cache"
     
     # Scheduler
     SUMMARY_SCHEDULE: str = "0 20 * * *"  # Daily at 8 PM
@@ -0,0 +1,36 @@
+import logging
+from functools import lru_cache
+
+from langchain_community.chat_models import ChatOllama
+
+from .config import settings
+from .rag.indexer import VectorIndexer
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_indexer() -> VectorIndexer:
+    """
+    Return the process-wide vector indexer.
+    
+    Every service shares this instance so only one embedding model is
+    loaded per process.
+    """
+    logger.info("Creating shared vector indexer")
+    return VectorIndexer()
+
+@lru_cache(maxsize=None)
+def get_llm(temperature: float = 0.1) -> ChatOllama:
+    """
+    Return the shared chat model for the given sampling temperature.
+    
+    Args:
+        temperature: Sampling temperature for generation
+    """
+    return ChatOllama(
+        base_url=settings.OLLAMA_BASE_URL,
+        model=settings.MODEL_NAME,
+        temperature=temperature,
+        num_ctx=settings.OLLAMA_NUM_CTX,
+        num_thread=settings.OLLAMA_NUM_THREAD,
+    )
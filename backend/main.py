@@ -1,11 +1,15 @@
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from .config import settings
 from .api.routes import router as api_router
 from .api.scheduler import init_scheduler, shutdown_scheduler
+from .deps import get_indexer
+from .services.summarizer import prewarm_llm
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +23,32 @@ async def lifespan(app: FastAPI):
     """Manage application startup and shutdown events."""
     logger.info("Starting application...")
     
+    # Make sure the vector collection exists before serving requests
+    indexer = get_indexer()
+    try:
+        await indexer.ensure_collection()
+    except Exception as e:
+        logger.error(f"Error preparing vector collection: {str(e)}", exc_info=True)
+    
+    # Batch concurrent vector searches into single Qdrant requests
+    indexer.batcher.start()
+    
+    # Warm up the LLM in the background so startup isn't delayed
+    prewarm_task = asyncio.create_task(prewarm_llm()) if settings.PREWARM_LLM else None
+    
     # Initialize scheduler
     scheduler = init_scheduler()
     
     yield
     
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    
     # Shutdown scheduler
     await shutdown_scheduler(scheduler)
+    
+    # Stop the query batcher
+    await indexer.batcher.stop()
     logger.info("Application shutdown complete")
 
 # Create FastAPI app
@@ -36,6 +59,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -72,4 +96,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        loop="auto",  # uvloop where installed; it has no Windows build
+        http="httptools",
     )
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent vector searches into a single batched Qdrant request.
+    
+    Queries submitted within a short window (or until the batch is full) are
+    sent together with one query_batch_points call, and each caller receives
+    its own response.
+    """
+    
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        window_ms: float = 5,
+        max_batch_size: int = 32,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Queries taken off the queue but not yet answered
+        self._batch: List[Tuple[models.QueryRequest, asyncio.Future]] = []
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background batching task is active."""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the background batching task on the running event loop."""
+        if self.running:
+            return
+        
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Query batcher started")
+    
+    async def stop(self) -> None:
+        """Stop the batching task and fail any queries still waiting."""
+        if not self.running:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        # Fail the batch that was cancelled in flight, then the queries still queued
+        pending = self._batch + [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Query batcher stopped"))
+        
+        self._batch = []
+        self._task = None
+        logger.info("Query batcher stopped")
+    
+    async def submit(self, request: models.QueryRequest) -> models.QueryResponse:
+        """
+        Queue a query for the next batch and wait for its response.
+        
+        Args:
+            request: The query to run
+        
+        Returns:
+            The Qdrant response for this query
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((request, future))
+        return await future
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            # The batch lives on the instance so stop() can fail it if cancelled mid-flight
+            self._batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            
+            # Collect more queries until the window closes or the batch is full
+            while len(self._batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._flush(self._batch)
+            self._batch = []
+    
+    async def _flush(self, batch: List[Tuple[models.QueryRequest, asyncio.Future]]) -> None:
+        """Send one batched request and resolve each caller's future."""
+        try:
+            responses = await self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[request for request, _ in batch],
+            )
+        except Exception as e:
+            logger.error(f"Error running batched query: {str(e)}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
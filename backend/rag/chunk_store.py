@@ -0,0 +1,62 @@
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import lmdb
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkStore:
+    """
+    Local LMDB store for chunk text, keyed by ``doc_id:chunk_id``.
+    
+    Keeping the text out of Qdrant payloads keeps the vector index small and
+    search responses light; text is fetched here only for returned hits.
+    """
+    
+    def __init__(self, path: Path, map_size: int):
+        path.mkdir(parents=True, exist_ok=True)
+        self.env = lmdb.open(str(path), map_size=map_size, readahead=False)
+        logger.info(f"Opened chunk store at {path}")
+    
+    @staticmethod
+    def _key(doc_id: str, chunk_id: int) -> bytes:
+        return f"{doc_id}:{chunk_id}".encode("utf-8")
+    
+    def put_many(self, chunks: Iterable[Tuple[str, int, str]]) -> None:
+        """
+        Store chunk texts in a single write transaction.
+        
+        Args:
+            chunks: (doc_id, chunk_id, text) tuples
+        """
+        with self.env.begin(write=True) as txn:
+            for doc_id, chunk_id, text in chunks:
+                txn.put(self._key(doc_id, chunk_id), text.encode("utf-8"))
+    
+    def get_many(self, keys: Iterable[Tuple[str, int]]) -> List[Optional[str]]:
+        """
+        Fetch chunk texts in a single read transaction.
+        
+        Args:
+            keys: (doc_id, chunk_id) tuples
+        
+        Returns:
+            Texts in the same order as the keys, None for missing entries
+        """
+        with self.env.begin() as txn:
+            values = [txn.get(self._key(doc_id, chunk_id)) for doc_id, chunk_id in keys]
+        return [value.decode("utf-8") if value is not None else None for value in values]
+    
+    def delete_documents(self, documents: Iterable[Tuple[str, int]]) -> None:
+        """
+        Remove every chunk of the given documents.
+        
+        Args:
+            documents: (doc_id, total_chunks) tuples
+        """
+        with self.env.begin(write=True) as txn:
+            for doc_id, total_chunks in documents:
+                for chunk_id in range(total_chunks):
+                    txn.delete(self._key(doc_id, chunk_id))
@@ -0,0 +1,48 @@
+import logging
+from typing import List, Optional
+
+from fastembed import TextEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Must match the vector size of the Qdrant collection (384)
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class FastEmbedEmbeddings:
+    """
+    ONNX Runtime embedding model exposing the LangChain embeddings interface.
+    
+    Uses fastembed's ONNX export of all-MiniLM-L6-v2, so vectors match the
+    collection's 384 dimensions while inference avoids PyTorch.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        batch_size: int = 64,
+        threads: Optional[int] = None,
+    ):
+        self.batch_size = batch_size
+        self.model = TextEmbedding(
+            model_name=model_name,
+            threads=threads,
+            providers=["CPUExecutionProvider"],
+        )
+        logger.info(f"Loaded embedding model {model_name}")
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of texts.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One embedding per text, in the same order
+        """
+        return [vector.tolist() for vector in self.model.embed(texts, batch_size=self.batch_size)]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return next(iter(self.model.query_embed(text))).tolist()
@@ -1,21 +1,170 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
 import json
-from datetime import datetime
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Qdrant
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import numpy as np
 from langchain_core.documents import Document as LangchainDocument
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
 
 from ...config import settings
 from ...services.loader import Document as CustomDocument
+from .batcher import QueryBatcher
+from .chunk_store import ChunkStore
+from .embeddings import FastEmbedEmbeddings
 
 logger = logging.getLogger(__name__)
 
+# Number of chunks embedded per forward pass
+EMBED_BATCH_SIZE = 64
+
+# Number of points sent to Qdrant per upsert request
+UPSERT_BATCH_SIZE = 256
+
+# Mapping of filter operators to Qdrant range fields
+RANGE_OPERATORS = {"$gt": "gt", "$gte": "gte", "$lt": "lt", "$lte": "lte"}
+
+# Metadata kept in the Qdrant payload for filtering and display; chunk text and
+# the remaining metadata stay out of the index
+PAYLOAD_METADATA_KEYS = ("source", "doc_id", "chunk_id", "total_chunks", "title", "last_modified", "ingestion_time")
+
+# Chunking parameters, in characters
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Matches each document's first chunk; every indexed document has exactly one
+FIRST_CHUNK_CONDITION = models.FieldCondition(
+    key="metadata.chunk_id",
+    match=models.MatchValue(value=0),
+)
+
+_SECONDS_PER_DAY = 86400
+
+_PARAGRAPH_BREAK = re.compile(r"\n\n+")
+
+
+def _fast_split(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split text into chunks of at most ``size`` characters.
+    
+    Paragraphs are merged greedily using integer offsets into the original
+    string, and paragraphs longer than ``size`` are cut into overlapping
+    windows. Consecutive chunks share trailing paragraphs that fit within
+    ``overlap`` characters.
+    
+    Operates on ``str`` directly: splitting UTF-8 bytes instead measured no
+    faster once the encode and per-chunk decode are included, and could cut
+    multi-byte characters.
+    """
+    # Paragraph (start, end) offsets, with oversized paragraphs cut into windows
+    pieces = []
+    step = size - overlap
+    position = 0
+    for boundary in [*_PARAGRAPH_BREAK.finditer(text), None]:
+        end = boundary.start() if boundary else len(text)
+        if end - position > size:
+            pieces.extend((start, min(start + size, end)) for start in range(position, end - overlap, step))
+        elif end > position:
+            pieces.append((position, end))
+        if boundary:
+            position = boundary.end()
+    
+    chunks = []
+    first = 0
+    while first < len(pieces):
+        # Extend the chunk while the next paragraph still fits
+        start = pieces[first][0]
+        last = first
+        while last + 1 < len(pieces) and pieces[last + 1][1] - start <= size:
+            last += 1
+        
+        chunk = text[start:pieces[last][1]].strip()
+        if chunk:
+            chunks.append(chunk)
+        if last + 1 == len(pieces):
+            break
+        
+        # Begin the next chunk at the earliest trailing paragraph within the overlap
+        end, next_end = pieces[last][1], pieces[last + 1][1]
+        following = last + 1
+        while (
+            following - 1 > first
+            and end - pieces[following - 1][0] <= overlap
+            and next_end - pieces[following - 1][0] <= size
+        ):
+            following -= 1
+        first = following
+    
+    return chunks
+
+
+def _quantization_config() -> Optional[models.QuantizationConfig]:
+    """Build the collection quantization config selected in settings."""
+    quantization = settings.QUANTIZATION.lower()
+    if quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def recency_cutoff(days: float) -> float:
+    """Epoch timestamp ``days`` ago, comparable with the ``ingestion_time`` payload field."""
+    return time.time() - days * _SECONDS_PER_DAY
+
+
+def recency_filter(cutoff_time: float, first_chunk_only: bool = False) -> models.Filter:
+    """
+    Build a filter matching chunks ingested after ``cutoff_time``.
+    
+    Args:
+        cutoff_time: Epoch timestamp, e.g. from ``recency_cutoff``
+        first_chunk_only: Match only each document's first chunk
+    """
+    conditions = [
+        models.FieldCondition(
+            key="metadata.ingestion_time",
+            range=models.Range(gt=cutoff_time),
+        )
+    ]
+    if first_chunk_only:
+        conditions.append(FIRST_CHUNK_CONDITION)
+    return models.Filter(must=conditions)
+
+
+@dataclass
+class SearchBatch:
+    """
+    Search results stored column-wise: one score array plus parallel content and metadata lists.
+    
+    Callers index the columns they need instead of building a dict per hit.
+    """
+    
+    scores: np.ndarray
+    contents: List[str]
+    metadatas: List[Dict[str, Any]]
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+
 
 class VectorIndexer:
     """
@@ -23,54 +172,201 @@ class VectorIndexer:
     """
     
     def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
-        )
+        # Sync client kept for admin scripts; request paths use the async client
         self.client = QdrantClient(url=settings.QDRANT_URL)
+        self.aclient = AsyncQdrantClient(url=settings.QDRANT_URL, prefer_grpc=True)
         self.collection_name = settings.QDRANT_COLLECTION
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            is_separator_regex=False,
+        self._collection_ready = False
+        self._collection_lock = asyncio.Lock()
+        # Coalesces concurrent searches once started from the application lifespan
+        self.batcher = QueryBatcher(
+            self.aclient,
+            self.collection_name,
+            window_ms=settings.BATCH_WINDOW_MS,
+            max_batch_size=settings.BATCH_MAX_SIZE,
         )
-        self._ensure_collection()
+        self._quantization = _quantization_config()
+        self._search_params = models.SearchParams(
+            hnsw_ef=settings.EF_SEARCH,
+            quantization=models.QuantizationSearchParams(
+                rescore=True,
+                oversampling=settings.QUANTIZATION_OVERSAMPLING,
+            ) if self._quantization else None,
+        )
+        # Set when this instance creates the collection, so the first ingest can skip deletes
+        self._collection_empty = False
+        # Embedding is a blocking forward pass, so it runs off the event loop
+        self._embed_pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count(),
+            thread_name_prefix="embed",
+        )
+    
+    @cached_property
+    def embeddings(self) -> FastEmbedEmbeddings:
+        """Embedding model, loaded on first use so endpoints that never embed skip the model load."""
+        return FastEmbedEmbeddings(batch_size=EMBED_BATCH_SIZE, threads=os.cpu_count())
+    
+    @cached_property
+    def chunk_store(self) -> ChunkStore:
+        """Chunk text store, opened on first use."""
+        return ChunkStore(settings.CHUNK_STORE_DIR, map_size=settings.CHUNK_STORE_MAP_SIZE)
     
-    def _ensure_collection(self) -> None:
-        """Ensure the Qdrant collection exists."""
-        collections = self.client.get_collections().collections
-        collection_names = [collection.name for collection in collections]
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query string in the embedding thread pool."""
+        loop = asyncio.get_running_loop()
+        # Resolve the model inside the worker so a first-use load never blocks the event loop
+        return await loop.run_in_executor(self._embed_pool, lambda: self.embeddings.embed_query(query))
+    
+    async def ensure_collection(self) -> None:
+        """Ensure the Qdrant collection exists. Only queries Qdrant on the first call."""
+        if self._collection_ready:
+            return
         
-        if self.collection_name not in collection_names:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config={
-                    "text": models.VectorParams(
-                        size=384,  # all-MiniLM-L6-v2 embedding size
-                        distance=models.Distance.COSINE,
-                    )
-                },
-            )
-            logger.info(f"Created new collection: {self.collection_name}")
+        # Concurrent first requests would otherwise all try to create the collection
+        async with self._collection_lock:
+            if self._collection_ready:
+                return
+            
+            response = await self.aclient.get_collections()
+            collection_names = [collection.name for collection in response.collections]
+            
+            if self.collection_name not in collection_names:
+                await self.aclient.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config={
+                        "text": models.VectorParams(
+                            size=384,  # all-MiniLM-L6-v2 embedding size
+                            distance=models.Distance.COSINE,
+                        )
+                    },
+                    hnsw_config=models.HnswConfigDiff(
+                        m=settings.HNSW_M,
+                        ef_construct=settings.HNSW_EF_CONSTRUCT,
+                        on_disk=False,
+                    ),
+                    quantization_config=self._quantization,
+                )
+                self._collection_empty = True
+                logger.info(f"Created new collection: {self.collection_name}")
+            else:
+                await self._sync_index_config()
+            
+            # Index the fields used by recency scrolls (ingestion_time for filtering and
+            # ordering, chunk_id for one-point-per-document lookups). Creating an index
+            # that already exists is a no-op.
+            for field_name, field_schema in (
+                ("metadata.ingestion_time", models.PayloadSchemaType.FLOAT),
+                ("metadata.chunk_id", models.PayloadSchemaType.INTEGER),
+            ):
+                await self.aclient.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+            
+            self._collection_ready = True
+    
+    async def _sync_index_config(self) -> None:
+        """Apply the configured HNSW and quantization settings to an existing collection if they differ."""
+        info = await self.aclient.get_collection(collection_name=self.collection_name)
+        hnsw = info.config.hnsw_config
+        hnsw_changed = (hnsw.m, hnsw.ef_construct) != (settings.HNSW_M, settings.HNSW_EF_CONSTRUCT)
+        quantization_changed = info.config.quantization_config != self._quantization
+        if not (hnsw_changed or quantization_changed):
+            return
+        
+        # Qdrant rebuilds the affected index segments in the background
+        await self.aclient.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=models.HnswConfigDiff(
+                m=settings.HNSW_M,
+                ef_construct=settings.HNSW_EF_CONSTRUCT,
+            ) if hnsw_changed else None,
+            quantization_config=(
+                self._quantization or models.Disabled.DISABLED
+            ) if quantization_changed else None,
+        )
+        logger.info(f"Updated index configuration of collection: {self.collection_name}")
     
-    def _document_to_langchain(self, doc: CustomDocument) -> List[LangchainDocument]:
-        """Convert our custom Document to LangChain's Document format."""
+    def _document_to_langchain(
+        self,
+        doc: CustomDocument,
+        ingestion_time: float,
+    ) -> List[LangchainDocument]:
+        """
+        Convert our custom Document to LangChain's Document format.
+        
+        Args:
+            doc: Document to split into chunks
+            ingestion_time: Epoch timestamp shared by every chunk of this ingestion run
+        """
         # Split the document content into chunks
-        chunks = self.text_splitter.split_text(doc.content)
+        chunks = _fast_split(doc.content)
         
-        # Create LangChain documents with metadata
-        lc_docs = []
-        for i, chunk in enumerate(chunks):
-            metadata = doc.metadata.copy()
-            metadata.update({
-                "chunk_id": i,
-                "total_chunks": len(chunks),
-                "ingestion_time": datetime.utcnow().isoformat(),
-            })
-            lc_docs.append(LangchainDocument(page_content=chunk, metadata=metadata))
+        # Metadata shared by every chunk; only chunk_id varies
+        base_metadata = {
+            **doc.metadata,
+            "doc_id": doc.doc_id,
+            "total_chunks": len(chunks),
+            "ingestion_time": ingestion_time,
+        }
         
-        return lc_docs
+        return [
+            LangchainDocument(page_content=chunk, metadata={**base_metadata, "chunk_id": i})
+            for i, chunk in enumerate(chunks)
+        ]
+    
+    async def _exclude_indexed(self, documents: List[CustomDocument]) -> List[CustomDocument]:
+        """
+        Drop documents whose content hash is already present in the collection.
+        
+        Args:
+            documents: Candidate documents to index
+            
+        Returns:
+            Documents that still need to be embedded
+        """
+        if self._collection_empty:
+            return documents
+        
+        doc_ids = [doc.doc_id for doc in documents]
+        
+        # Every indexed document has exactly one chunk 0, so one point per doc_id
+        records, _ = await self.aclient.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="metadata.doc_id",
+                        match=models.MatchAny(any=doc_ids),
+                    ),
+                    FIRST_CHUNK_CONDITION,
+                ]
+            ),
+            limit=len(doc_ids),
+            with_payload=["metadata.doc_id", "metadata.total_chunks"],
+            with_vectors=False,
+        )
+        
+        # A document only counts as indexed if the chunk store still holds all of its text
+        found = [
+            (record.payload["metadata"]["doc_id"], record.payload["metadata"].get("total_chunks", 1))
+            for record in records
+        ]
+        keys = [(doc_id, chunk_id) for doc_id, total_chunks in found for chunk_id in range(total_chunks)]
+        stored = iter(await asyncio.to_thread(self.chunk_store.get_many, keys) if keys else [])
+        
+        indexed_ids = set()
+        for doc_id, total_chunks in found:
+            if None not in list(islice(stored, total_chunks)):
+                indexed_ids.add(doc_id)
+            else:
+                logger.warning(f"Chunk store is missing text of indexed document {doc_id}; reindexing it")
+        
+        if indexed_ids:
+            logger.info(f"Skipping {len(indexed_ids)} unchanged documents")
+        
+        return [doc for doc, doc_id in zip(documents, doc_ids) if doc_id not in indexed_ids]
     
     async def index_documents(self, documents: List[CustomDocument]) -> int:
         """
@@ -86,74 +382,160 @@ class VectorIndexer:
             logger.warning("No documents to index")
             return 0
         
+        await self.ensure_collection()
+        
+        # Skip documents whose exact content is already in the index
+        documents = await self._exclude_indexed(documents)
+        if not documents:
+            logger.info("All documents are already indexed")
+            return 0
+        
         # Convert to LangChain documents and split into chunks
+        ingestion_time = time.time()
         all_chunks = []
         for doc in documents:
-            all_chunks.extend(self._document_to_langchain(doc))
+            all_chunks.extend(self._document_to_langchain(doc, ingestion_time))
         
         if not all_chunks:
             logger.warning("No document chunks to index after splitting")
             return 0
         
-        # Create the vector store and add documents
-        vector_store = Qdrant(
-            client=self.client,
-            collection_name=self.collection_name,
-            embeddings=self.embeddings,
+        # Sources come from the input documents rather than from every chunk
+        source_paths = list({doc.metadata["source"] for doc in documents if doc.metadata.get("source")})
+        
+        # Embed all chunks in one batched call
+        texts = [chunk.page_content for chunk in all_chunks]
+        loop = asyncio.get_running_loop()
+        embed_future = loop.run_in_executor(self._embed_pool, lambda: self.embeddings.embed_documents(texts))
+        
+        # Delete existing documents with the same source to avoid duplicates.
+        # The delete overlaps with embedding and completes before the upsert.
+        if source_paths and not self._collection_empty:
+            vectors, _ = await asyncio.gather(embed_future, self.delete_sources(source_paths))
+        else:
+            vectors = await embed_future
+        
+        # Store chunk text locally before the points become searchable
+        await asyncio.to_thread(
+            self.chunk_store.put_many,
+            [
+                (chunk.metadata["doc_id"], chunk.metadata["chunk_id"], chunk.page_content)
+                for chunk in all_chunks
+            ],
         )
         
-        # Delete existing documents with the same source to avoid duplicates
-        source_paths = list(set(doc.metadata.get("source") for doc in all_chunks if doc.metadata.get("source")))
-        if source_paths:
-            self.client.delete(
+        points = [
+            models.PointStruct(
+                id=uuid.uuid4().hex,
+                vector={"text": vector},
+                payload={
+                    "metadata": {
+                        key: chunk.metadata[key]
+                        for key in PAYLOAD_METADATA_KEYS
+                        if key in chunk.metadata
+                    },
+                },
+            )
+            for chunk, vector in zip(all_chunks, vectors)
+        ]
+        
+        # Add new documents in fixed-size batches. Qdrant applies updates in order,
+        # so waiting on the last batch means every chunk is stored on return.
+        for start in range(0, len(points), UPSERT_BATCH_SIZE):
+            await self.aclient.upsert(
                 collection_name=self.collection_name,
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[
-                            models.FieldCondition(
-                                key="metadata.source",
-                                match=models.MatchAny(any=source_paths),
-                            )
-                        ]
-                    )
-                ),
+                points=points[start:start + UPSERT_BATCH_SIZE],
+                wait=start + UPSERT_BATCH_SIZE >= len(points),
             )
         
-        # Add new documents
-        doc_ids = await vector_store.aadd_documents(all_chunks)
-        logger.info(f"Indexed {len(doc_ids)} document chunks from {len(documents)} documents")
+        self._collection_empty = False
+        logger.info(f"Indexed {len(points)} document chunks from {len(documents)} documents")
+        
+        return len(points)
+    
+    async def delete_sources(self, source_paths: List[str]) -> None:
+        """
+        Delete all chunks belonging to the given sources.
+        
+        Args:
+            source_paths: Source paths (relative to the notes directory) to remove
+        """
+        source_condition = models.FieldCondition(
+            key="metadata.source",
+            match=models.MatchAny(any=source_paths),
+        )
+        
+        # Find the documents being removed so their stored chunk text can be dropped too
+        records, _ = await self.aclient.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=models.Filter(
+                must=[
+                    source_condition,
+                    FIRST_CHUNK_CONDITION,
+                ]
+            ),
+            limit=len(source_paths),
+            with_payload=["metadata.doc_id", "metadata.total_chunks"],
+            with_vectors=False,
+        )
+        
+        await self.aclient.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(must=[source_condition])
+            ),
+        )
         
-        return len(doc_ids)
+        removed = [
+            (record.payload["metadata"]["doc_id"], record.payload["metadata"].get("total_chunks", 1))
+            for record in records
+            if record.payload.get("metadata", {}).get("doc_id")
+        ]
+        if removed:
+            await asyncio.to_thread(self.chunk_store.delete_documents, removed)
     
     async def similarity_search(
         self, 
         query: str, 
         k: int = 5,
-        filter: Optional[Dict[str, Any]] = None,
-    ) -> List[Dict[str, Any]]:
+        filter: Optional[Union[Dict[str, Any], models.Filter]] = None,
+        query_vector: Optional[List[float]] = None,
+        bypass_embedding: bool = False,
+    ) -> SearchBatch:
         """
         Perform a similarity search in the vector store.
         
         Args:
             query: The query string
             k: Number of results to return
-            filter: Optional filter to apply to the search
+            filter: Optional filter to apply to the search, either a metadata dict
+                or a prebuilt Qdrant filter
+            query_vector: Precomputed embedding of the query, if already available
+            bypass_embedding: The query is only a placeholder; return the newest
+                chunks matching the filter without embedding or vector search
             
         Returns:
-            List of search results with metadata
+            Scores, contents and metadata of the results, in rank order
+            (newest first, with zero scores, when bypassing the embedding)
         """
-        vector_store = Qdrant(
-            client=self.client,
-            collection_name=self.collection_name,
-            embeddings=self.embeddings,
-        )
+        await self.ensure_collection()
         
         # Convert filter to Qdrant filter if provided
-        qdrant_filter = None
-        if filter:
+        qdrant_filter = filter if isinstance(filter, models.Filter) else None
+        if isinstance(filter, dict) and filter:
             must_conditions = []
             for key, value in filter.items():
-                if isinstance(value, list):
+                if isinstance(value, dict):
+                    # Range operators, e.g. {"ingestion_time": {"$gt": cutoff}}
+                    must_conditions.append(
+                        models.FieldCondition(
+                            key=f"metadata.{key}",
+                            range=models.Range(
+                                **{RANGE_OPERATORS[op]: bound for op, bound in value.items()}
+                            ),
+                        )
+                    )
+                elif isinstance(value, list):
                     must_conditions.append(
                         models.FieldCondition(
                             key=f"metadata.{key}",
@@ -170,29 +552,113 @@ class VectorIndexer:
             
             qdrant_filter = models.Filter(must=must_conditions)
         
-        # Perform the search
-        results = await vector_store.asimilarity_search_with_score(
-            query=query,
-            k=k,
+        # Filter-only lookups don't need the embedding model or the HNSW graph
+        if bypass_embedding and qdrant_filter is not None:
+            return await self._scroll_newest(qdrant_filter, limit=k)
+        
+        # Embed the query unless the caller already has its embedding
+        if query_vector is None:
+            query_vector = await self.embed_query(query)
+        
+        # Perform the search, batched with concurrent searches when the batcher is running
+        request = models.QueryRequest(
+            query=query_vector,
+            using="text",
+            limit=k,
             filter=qdrant_filter,
+            params=self._search_params,
+            with_payload=True,
         )
+        if self.batcher.running:
+            response = await self.batcher.submit(request)
+        else:
+            response = await self.aclient.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                using="text",
+                limit=k,
+                query_filter=qdrant_filter,
+                search_params=self._search_params,
+                with_payload=True,
+            )
         
-        # Format results
-        formatted_results = []
-        for doc, score in results:
-            result = {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": float(score),
-            }
-            formatted_results.append(result)
+        points, contents, metadatas = self._fetch_contents(response.points)
+        scores = np.fromiter((point.score for point in points), dtype=np.float32, count=len(points))
+        
+        return SearchBatch(scores=scores, contents=contents, metadatas=metadatas)
+    
+    async def scroll_recent(
+        self,
+        cutoff_time: float,
+        limit: int = 50,
+        first_chunk_only: bool = False,
+    ) -> SearchBatch:
+        """
+        Fetch the most recently ingested chunks without running a vector search.
+        
+        Args:
+            cutoff_time: Epoch timestamp; only chunks ingested after it are returned
+            limit: Maximum number of chunks to return
+            first_chunk_only: Return only each document's first chunk, i.e. one
+                point per document, deduplicated by Qdrant
+            
+        Returns:
+            Contents and metadata of the chunks, newest first. Scores are zero
+            since nothing is ranked by similarity.
+        """
+        await self.ensure_collection()
+        
+        return await self._scroll_newest(recency_filter(cutoff_time, first_chunk_only), limit=limit)
+    
+    async def _scroll_newest(self, qdrant_filter: models.Filter, limit: int) -> SearchBatch:
+        """Scroll the newest chunks matching a filter, reading payloads only."""
+        records, _ = await self.aclient.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=qdrant_filter,
+            limit=limit,
+            order_by=models.OrderBy(key="metadata.ingestion_time", direction=models.Direction.DESC),
+            with_payload=True,
+            with_vectors=False,
+        )
+        records, contents, metadatas = self._fetch_contents(records)
+        
+        return SearchBatch(scores=np.zeros(len(records), dtype=np.float32), contents=contents, metadatas=metadatas)
+    
+    def _fetch_contents(self, points: List[Any]) -> Tuple[List[Any], List[str], List[Dict[str, Any]]]:
+        """
+        Look up the chunk text and metadata of search hits or scrolled records.
+        
+        Text comes from the local chunk store; older points still carry it in the payload.
+        Points whose text is found in neither place are dropped as misses.
+        
+        Returns:
+            The points that have text, with their contents and metadata
+        """
+        metadatas = [point.payload.get("metadata", {}) for point in points]
+        keys = [(metadata["doc_id"], metadata["chunk_id"]) for metadata in metadatas if "doc_id" in metadata]
+        stored = iter(self.chunk_store.get_many(keys) if keys else [])
+        
+        found_points, contents, found_metadatas = [], [], []
+        for point, metadata in zip(points, metadatas):
+            content = next(stored) if "doc_id" in metadata else None
+            if content is None:
+                content = point.payload.get("page_content")
+            if content is None:
+                logger.warning(
+                    f"Chunk store is missing chunk {metadata.get('chunk_id')} of document "
+                    f"{metadata.get('doc_id')} ({metadata.get('source')}); skipping it"
+                )
+                continue
+            found_points.append(point)
+            contents.append(content)
+            found_metadatas.append(metadata)
         
-        return formatted_results
+        return found_points, contents, found_metadatas
     
     async def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the vector collection."""
         try:
-            collection_info = self.client.get_collection(collection_name=self.collection_name)
+            collection_info = await self.aclient.get_collection(collection_name=self.collection_name)
             return {
                 "name": collection_info.name,
                 "status": collection_info.status,
@@ -0,0 +1,113 @@
+import logging
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(embedding: Sequence[float]) -> np.ndarray:
+    """Convert an embedding to a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Bounded LRU cache that matches entries by embedding similarity.
+    
+    Vectors are normalized on insert so cosine similarity against every
+    cached entry reduces to a single matrix-vector product. An optional tag
+    stored with each entry restricts hits to entries with the same tag, for
+    request options that change the answer but not the embedding.
+    """
+    
+    def __init__(self, threshold: float, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._keys: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._tags: Optional[np.ndarray] = None
+        self._created: Optional[np.ndarray] = None
+        self._counter = count()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, embedding: Sequence[float], tag: Hashable = None) -> Optional[Any]:
+        """
+        Look up the cached value whose embedding is most similar to the query.
+        
+        Args:
+            embedding: Embedding of the query
+            tag: Only entries stored with this tag can match
+        
+        Returns:
+            The cached value, or None if no entry meets the threshold
+        """
+        if not self._entries:
+            return None
+        
+        # Rebuild the stacked matrix lazily after inserts/evictions
+        if self._matrix is None:
+            self._rebuild()
+        
+        # Evict expired entries before matching so they can't shadow a fresh one
+        if self.ttl is not None:
+            expired = time.monotonic() - self._created > self.ttl
+            if expired.any():
+                for key, is_expired in zip(self._keys, expired):
+                    if is_expired:
+                        del self._entries[key]
+                self._matrix = None
+                if not self._entries:
+                    return None
+                self._rebuild()
+        
+        scores = self._matrix @ _normalize(embedding)
+        scores[self._tags != tag] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        
+        key = self._keys[best]
+        value = self._entries[key][1]
+        self._entries.move_to_end(key)
+        return value
+    
+    def _rebuild(self) -> None:
+        """Restack the entry vectors, tags and creation times after inserts or evictions."""
+        self._keys = list(self._entries)
+        entries = [self._entries[key] for key in self._keys]
+        self._matrix = np.stack([entry[0] for entry in entries])
+        self._created = np.array([entry[2] for entry in entries], dtype=np.float64)
+        self._tags = np.empty(len(entries), dtype=object)
+        self._tags[:] = [entry[3] for entry in entries]
+    
+    def set(self, embedding: Sequence[float], value: Any, tag: Hashable = None) -> None:
+        """
+        Store a value under the given embedding, evicting the least recently used entry if full.
+        
+        Args:
+            embedding: Embedding of the query
+            value: Value to cache
+            tag: Tag a later lookup must pass to match this entry
+        """
+        self._entries[next(self._counter)] = (_normalize(embedding), value, time.monotonic(), tag)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        self._matrix = None
+    
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._entries.clear()
+        self._keys = []
+        self._matrix = None
+        self._tags = None
+        self._created = None
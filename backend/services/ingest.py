@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Dict, Any
+
+from ...config import settings
+from ..deps import get_indexer
+from .loader import Manifest, load_documents
+from .qa import qa_cache
+
+logger = logging.getLogger(__name__)
+
+# Serializes ingestion runs so they never race on the manifest
+_ingest_lock = asyncio.Lock()
+
+async def run_ingestion() -> Dict[str, Any]:
+    """
+    Index new and changed notes and drop notes that were deleted from disk.
+    
+    Files whose modification time and size match the manifest are skipped
+    without being read, so a run with no changes only costs one stat call
+    per file.
+    
+    Returns:
+        Counts of loaded documents, indexed chunks and removed sources
+    """
+    async with _ingest_lock:
+        try:
+            manifest = Manifest(settings.MANIFEST_FILE)
+            documents = await asyncio.to_thread(load_documents, settings.NOTES_DIR, manifest)
+            
+            indexer = get_indexer()
+            if manifest.removed:
+                await indexer.delete_sources(manifest.removed)
+            chunks = await indexer.index_documents(documents)
+            
+            # Only record files once their chunks are safely indexed
+            manifest.commit()
+            
+            # Cached answers may quote notes that just changed or were removed
+            if chunks or manifest.removed:
+                qa_cache.clear()
+            
+            logger.info(
+                f"Ingestion complete: {len(documents)} changed documents, "
+                f"{chunks} chunks, {len(manifest.removed)} removed sources"
+            )
+            return {
+                "documents": len(documents),
+                "chunks": chunks,
+                "removed": len(manifest.removed),
+            }
+            
+        except Exception as e:
+            logger.error(f"Error during ingestion: {str(e)}", exc_info=True)
+            return {"error": str(e)}
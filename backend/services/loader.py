@@ -1,16 +1,25 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import frontmatter
-from unstructured.partition.auto import partition
 from datetime import datetime
-import hashlib
 import json
+import orjson
+import xxhash
 
 from ...config import settings
 
 logger = logging.getLogger(__name__)
 
+# Number of files parsed concurrently by load_documents
+LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+# File extensions picked up by load_documents
+SUPPORTED_EXTENSIONS = frozenset({'.md', '.txt', '.mdx', '.markdown', '.csv', '.docx', '.pptx', '.pdf'})
+
 class Document:
     """A class to represent a document with metadata and content."""
     
@@ -21,17 +30,20 @@ class Document:
         source_path: Optional[Path] = None,
     ):
         self.content = content
-        self.metadata = metadata or {}
         self.source_path = source_path
         
-        # Add source file info to metadata if available
+        # Build a fresh metadata dict (never mutate the caller's), adding source
+        # file info if available. It is not modified afterwards, so doc_id can be cached.
         if source_path:
-            self.metadata.update({
+            self.metadata = {
+                **(metadata or {}),
                 "source": str(source_path.relative_to(settings.NOTES_DIR)),
                 "file_name": source_path.name,
                 "file_type": source_path.suffix.lower(),
                 "last_modified": datetime.fromtimestamp(source_path.stat().st_mtime).isoformat(),
-            })
+            }
+        else:
+            self.metadata = dict(metadata or {})
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert document to dictionary for storage."""
@@ -51,13 +63,91 @@ class Document:
             source_path=source_path,
         )
     
-    @property
+    @cached_property
     def doc_id(self) -> str:
-        """Generate a unique ID for the document based on its content and metadata."""
-        doc_str = f"{self.content}{json.dumps(self.metadata, sort_keys=True)}"
-        return hashlib.sha256(doc_str.encode()).hexdigest()
+        """
+        Generate a unique ID for the document based on its content and metadata.
+        
+        The ID identifies content rather than securing it, so a fast
+        non-cryptographic 128-bit hash is used. Content and metadata are fed
+        to the hash separately to avoid building a concatenated copy.
+        Computed once per document.
+        """
+        digest = xxhash.xxh3_128()
+        digest.update(self.content.encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(orjson.dumps(
+            self.metadata,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        ))
+        return digest.hexdigest()
 
 
+class Manifest:
+    """
+    Persisted (mtime_ns, size) of every ingested file, used to skip files that haven't changed.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, List[int]] = {}
+        self.removed: List[str] = []
+        self._seen: Dict[str, List[int]] = {}
+        self._loaded: Set[str] = set()
+        
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable manifest {path}: {str(e)}")
+    
+    @staticmethod
+    def _source(file_path: Path) -> str:
+        """Manifest key for a file, matching the document's ``source`` metadata."""
+        return str(file_path.relative_to(settings.NOTES_DIR))
+    
+    def changed_files(self, file_paths: List[Path]) -> List[Path]:
+        """
+        Filter out files whose modification time and size match the manifest.
+        
+        Also records which previously ingested files no longer exist in ``removed``.
+        
+        Args:
+            file_paths: All candidate files found on disk
+            
+        Returns:
+            Files that are new or changed since the last commit
+        """
+        changed = []
+        self._seen = {}
+        for file_path in file_paths:
+            stat = file_path.stat()
+            source = self._source(file_path)
+            self._seen[source] = [stat.st_mtime_ns, stat.st_size]
+            if self.entries.get(source) != self._seen[source]:
+                changed.append(file_path)
+        
+        self.removed = [source for source in self.entries if source not in self._seen]
+        return changed
+    
+    def mark_loaded(self, file_path: Path) -> None:
+        """Mark a file as successfully loaded so it is recorded on commit."""
+        self._loaded.add(self._source(file_path))
+    
+    def commit(self) -> None:
+        """Record loaded files, forget removed ones and write the manifest to disk."""
+        for source in self._loaded:
+            self.entries[source] = self._seen[source]
+        for source in self.removed:
+            self.entries.pop(source, None)
+        
+        # Write to a temporary file first so a crash never leaves a partial manifest
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+        
+        self._loaded.clear()
+
 def load_document(file_path: Path) -> Optional[Document]:
     """
     Load a single document from a file.
@@ -99,9 +189,16 @@ def _load_markdown(file_path: Path) -> Optional[Document]:
         logger.error(f"Error parsing markdown file {file_path}: {str(e)}")
         return None
 
+@lru_cache(maxsize=1)
+def _get_partition():
+    """Import unstructured's partitioner on first use, since the import is slow and memory-heavy."""
+    from unstructured.partition.auto import partition
+    return partition
+
 def _load_with_unstructured(file_path: Path) -> Optional[Document]:
     """Load a document using unstructured library."""
     try:
+        partition = _get_partition()
         elements = partition(filename=str(file_path))
         content = "\n\n".join([str(el) for el in elements])
         
@@ -116,12 +213,20 @@ def _load_with_unstructured(file_path: Path) -> Optional[Document]:
         logger.error(f"Error processing {file_path} with unstructured: {str(e)}")
         return None
 
-def load_documents(directory: Path) -> List[Document]:
+def _file_size(file_path: Path) -> int:
+    """Return the size of a file in bytes, or 0 if it cannot be read."""
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+def load_documents(directory: Path, manifest: Optional[Manifest] = None) -> List[Document]:
     """
     Load all documents from a directory recursively.
     
     Args:
         directory: Directory to search for documents
+        manifest: Optional manifest; files unchanged since its last commit are skipped
         
     Returns:
         List of Document objects
@@ -133,15 +238,26 @@ def load_documents(directory: Path) -> List[Document]:
         logger.warning(f"Directory {directory} does not exist")
         return documents
     
-    # Define supported file extensions
-    supported_extensions = {'.md', '.txt', '.mdx', '.markdown', '.csv', '.docx', '.pptx', '.pdf'}
-    
     # Walk through the directory
-    for file_path in directory.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-            doc = load_document(file_path)
-            if doc:
-                documents.append(doc)
+    file_paths = [
+        file_path for file_path in directory.rglob('*')
+        if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+    ]
+    
+    if manifest is not None:
+        file_paths = manifest.changed_files(file_paths)
+    
+    # Parse files in parallel, starting the largest first so they don't finish last.
+    # Results are collected in discovery order.
+    futures = [None] * len(file_paths)
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+        for i in sorted(range(len(file_paths)), key=lambda j: _file_size(file_paths[j]), reverse=True):
+            futures[i] = executor.submit(load_document, file_paths[i])
+        documents = [doc for doc in (future.result() for future in futures) if doc]
+    
+    if manifest is not None:
+        for doc in documents:
+            manifest.mark_loaded(doc.source_path)
     
     logger.info(f"Loaded {len(documents)} documents from {directory}")
     return documents
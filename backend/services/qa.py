@@ -1,20 +1,27 @@
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import json
 
+import numpy as np
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.chat_models import ChatOllama
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
 from ...config import settings
-from ..rag.indexer import VectorIndexer
+from ..deps import get_indexer, get_llm
+from ..rag.indexer import SearchBatch, recency_cutoff, recency_filter
+from .cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
-# Initialize the vector indexer
-indexer = VectorIndexer()
+# Cache answers to previously seen (or paraphrased) questions, per context limit.
+# Cleared by ingestion whenever the indexed notes change.
+qa_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    maxsize=settings.SEMANTIC_CACHE_SIZE,
+    ttl=settings.SEMANTIC_CACHE_TTL,
+)
 
 # Define the prompt template for question answering
 QA_PROMPT = """You are a helpful AI assistant that answers questions based on the provided context. 
@@ -27,12 +34,30 @@ Context:
 Question: {question}
 Helpful Answer:"""
 
-# Initialize the LLM
-llm = ChatOllama(
-    base_url=settings.OLLAMA_BASE_URL,
-    model=settings.MODEL_NAME,
-    temperature=0.1,
-)
+NO_RESULTS_ANSWER = "I couldn't find any relevant information to answer your question."
+
+PROMPT = ChatPromptTemplate.from_template(QA_PROMPT)
+
+@lru_cache(maxsize=1)
+def _get_qa_chain():
+    """Build the RAG chain once; it is stateless and shared by all requests."""
+    return PROMPT | get_llm() | StrOutputParser()
+
+def _format_context(search_results: SearchBatch) -> str:
+    """Join retrieved chunks into the context block of the prompt."""
+    return "\n\n---\n\n".join([
+        f"Source: {metadata.get('source', 'Unknown')}\n"
+        f"Content: {content}"
+        for content, metadata in zip(search_results.contents, search_results.metadatas)
+    ])
+
+def _format_sources(search_results: SearchBatch) -> str:
+    """List the distinct sources of the retrieved chunks."""
+    sources = list(set(
+        metadata.get('source', 'Unknown')
+        for metadata in search_results.metadatas
+    ))
+    return f"Sources: {', '.join(sources) if sources else 'No sources found'}"
 
 async def get_qa_response(question: str, limit: int = 5) -> str:
     """
@@ -48,47 +73,95 @@ async def get_qa_response(question: str, limit: int = 5) -> str:
     try:
         logger.info(f"Processing question: {question}")
         
+        # Return a cached answer for near-identical questions
+        indexer = get_indexer()
+        question_embedding = await indexer.embed_query(question)
+        cached = qa_cache.get(question_embedding, tag=limit)
+        if cached is not None:
+            logger.info("Semantic cache hit")
+            response, sources = cached
+            return f"{response}\n\n{sources}"
+        
         # 1. Retrieve relevant documents
         search_results = await indexer.similarity_search(
             query=question,
             k=limit,
+            query_vector=question_embedding,
         )
         
         if not search_results:
-            return "I couldn't find any relevant information to answer your question."
-        
-        # 2. Format the context
-        context = "\n\n---\n\n".join([
-            f"Source: {result['metadata'].get('source', 'Unknown')}\n"
-            f"Content: {result['content']}"
-            for result in search_results
-        ])
-        
-        # 3. Set up the RAG chain
-        prompt = ChatPromptTemplate.from_template(QA_PROMPT)
-        
-        chain = (
-            {"context": lambda x: context, "question": lambda x: x}
-            | prompt
-            | llm
-            | StrOutputParser()
-        )
+            return NO_RESULTS_ANSWER
         
-        # 4. Generate the response
-        response = await chain.ainvoke(question)
+        # 2. Generate the response
+        response = await _get_qa_chain().ainvoke({
+            "context": _format_context(search_results),
+            "question": question,
+        })
         
-        # 5. Add sources to the response
-        sources = list(set(
-            result['metadata'].get('source', 'Unknown')
-            for result in search_results
-        ))
+        # 3. Add sources to the response
+        sources = _format_sources(search_results)
+        qa_cache.set(question_embedding, (response, sources), tag=limit)
         
-        return f"{response}\n\nSources: {', '.join(sources) if sources else 'No sources found'}"
+        return f"{response}\n\n{sources}"
         
     except Exception as e:
         logger.error(f"Error generating QA response: {str(e)}", exc_info=True)
         return f"I encountered an error while processing your question: {str(e)}"
 
+async def stream_qa_response(question: str, limit: int = 5) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Stream an answer to a question using the RAG pipeline.
+    
+    Args:
+        question: The question to answer
+        limit: Maximum number of context chunks to use
+        
+    Yields:
+        ("token", text) pieces of the answer as the LLM generates them, then a
+        final ("done", sources) event, or ("error", message) on failure
+    """
+    try:
+        logger.info(f"Streaming answer to question: {question}")
+        
+        # Replay a cached answer for near-identical questions
+        indexer = get_indexer()
+        question_embedding = await indexer.embed_query(question)
+        cached = qa_cache.get(question_embedding, tag=limit)
+        if cached is not None:
+            logger.info("Semantic cache hit")
+            response, sources = cached
+            yield "token", response
+            yield "done", sources
+            return
+        
+        search_results = await indexer.similarity_search(
+            query=question,
+            k=limit,
+            query_vector=question_embedding,
+        )
+        
+        if not search_results:
+            yield "token", NO_RESULTS_ANSWER
+            yield "done", ""
+            return
+        
+        chunks = []
+        async for chunk in _get_qa_chain().astream({
+            "context": _format_context(search_results),
+            "question": question,
+        }):
+            chunks.append(chunk)
+            yield "token", chunk
+        
+        # Only complete answers are cached; a client disconnect stops the loop above
+        sources = _format_sources(search_results)
+        qa_cache.set(question_embedding, ("".join(chunks), sources), tag=limit)
+        yield "done", sources
+        
+    except Exception as e:
+        logger.error(f"Error streaming QA response: {str(e)}", exc_info=True)
+        yield "error", f"I encountered an error while processing your question: {str(e)}"
+
 async def get_recent_updates(days: int = 7) -> List[Dict[str, Any]]:
     """
     Get recently added or updated documents.
@@ -100,32 +173,32 @@ async def get_recent_updates(days: int = 7) -> List[Dict[str, Any]]:
         List of recent documents with metadata
     """
     try:
-        # Calculate the cutoff date
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        
-        # Search for recent documents
-        recent_docs = await indexer.similarity_search(
-            query="recent updates",  # Generic query to get recent documents
+        # Fetch recent documents by filter alone; the query is only a placeholder.
+        # Matching first chunks only gives one hit per document, so a long note
+        # cannot fill the whole limit with its own chunks.
+        recent_docs = await get_indexer().similarity_search(
+            query="recent updates",
             k=20,  # Limit the number of results
-            filter={"ingestion_time": {"$gt": cutoff_date}}
+            filter=recency_filter(recency_cutoff(days), first_chunk_only=True),
+            bypass_embedding=True,
         )
         
-        # Process and deduplicate results by source
-        seen_sources = set()
-        unique_docs = []
-        
-        for doc in recent_docs:
-            source = doc['metadata'].get('source')
-            if source and source not in seen_sources:
-                seen_sources.add(source)
-                unique_docs.append({
-                    'source': source,
-                    'title': doc['metadata'].get('title', 'Untitled'),
-                    'last_modified': doc['metadata'].get('last_modified', 'Unknown'),
-                    'snippet': doc['content'][:200] + '...',  # First 200 chars as preview
-                })
-        
-        return unique_docs
+        # Deduplicate by source, keeping each source's best-ranked hit in retrieval order
+        sources = np.array([metadata.get('source') or '' for metadata in recent_docs.metadatas])
+        _, first_idx = np.unique(sources, return_index=True)
+        first_idx.sort()
+        
+        metadatas, contents = recent_docs.metadatas, recent_docs.contents
+        return [
+            {
+                'source': metadatas[i]['source'],
+                'title': metadatas[i].get('title', 'Untitled'),
+                'last_modified': metadatas[i].get('last_modified', 'Unknown'),
+                'snippet': contents[i][:200] + '...',  # First 200 chars as preview
+            }
+            for i in first_idx
+            if sources[i]
+        ]
         
     except Exception as e:
         logger.error(f"Error fetching recent updates: {str(e)}", exc_info=True)
@@ -139,7 +212,7 @@ async def get_collection_stats() -> Dict[str, Any]:
         Dictionary with collection statistics
     """
     try:
-        return await indexer.get_collection_info()
+        return await get_indexer().get_collection_info()
     except Exception as e:
         logger.error(f"Error getting collection stats: {str(e)}", exc_info=True)
         return {"error": str(e)}
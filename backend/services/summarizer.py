@@ -1,31 +1,33 @@
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from datetime import datetime
 import json
 from pathlib import Path
 
+import aiofiles
+from diskcache import Cache
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.chat_models import ChatOllama
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
 from ...config import settings
-from ..rag.indexer import VectorIndexer
+from ..deps import get_indexer, get_llm
+from ..rag.indexer import recency_cutoff
 
 logger = logging.getLogger(__name__)
 
-# Initialize the vector indexer
-indexer = VectorIndexer()
+# Summaries directory already created by this process, so mkdir runs once rather than per save
+_summaries_dir_ready: Optional[Path] = None
 
-# Initialize the LLM
-llm = ChatOllama(
-    base_url=settings.OLLAMA_BASE_URL,
-    model=settings.MODEL_NAME,
-    temperature=0.2,  # Slightly higher temperature for more creative summaries
-)
+# Slightly higher temperature for more creative summaries
+SUMMARY_TEMPERATURE = 0.2
 
-# Define the summarization prompt
-SUMMARY_PROMPT = """You are an expert at summarizing and synthesizing information. 
+# Define the summarization prompt. The static instructions go in the system
+# message, ahead of the notes, so the LLM server can reuse their cached prefix
+SUMMARY_SYSTEM_PROMPT = """You are an expert at summarizing and synthesizing information. 
 Your task is to create a concise, well-organized daily summary of the following notes.
 
 Focus on:
@@ -34,13 +36,91 @@ Focus on:
 3. New information or insights
 4. Any follow-up needed
 
-Be concise but comprehensive. Use bullet points and organize by topic when possible.
+Be concise but comprehensive. Use bullet points and organize by topic when possible."""
 
-Notes to summarize:
+SUMMARY_PROMPT = """Notes to summarize:
 {context}
 
 Concise Daily Summary:"""
 
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SUMMARY_SYSTEM_PROMPT),
+    ("human", SUMMARY_PROMPT),
+])
+
+# Prompt used to condense each note before the final summary
+NOTE_SUMMARY_SYSTEM_PROMPT = """You are an expert at summarizing information. 
+Condense the following note into a few short bullet points.
+
+Keep key themes, decisions or action items, new insights and any follow-up needed. 
+Do not add information that is not in the note."""
+
+NOTE_SUMMARY_PROMPT = """Note:
+{context}
+
+Condensed Note:"""
+
+NOTE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", NOTE_SUMMARY_SYSTEM_PROMPT),
+    ("human", NOTE_SUMMARY_PROMPT),
+])
+
+@lru_cache(maxsize=1)
+def _get_summary_chain():
+    """Build the summarization chain once; it is stateless and shared by all calls."""
+    return (
+        {"context": RunnablePassthrough()}
+        | PROMPT
+        | get_llm(temperature=SUMMARY_TEMPERATURE)
+        | StrOutputParser()
+    )
+
+@lru_cache(maxsize=1)
+def _get_note_summary_chain():
+    """Build the per-note condensing chain once."""
+    return (
+        {"context": RunnablePassthrough()}
+        | NOTE_PROMPT
+        | get_llm(temperature=SUMMARY_TEMPERATURE)
+        | StrOutputParser()
+    )
+
+@lru_cache(maxsize=1)
+def _get_summary_cache() -> Cache:
+    """Open the on-disk cache of generated summaries."""
+    return Cache(str(settings.SUMMARY_CACHE_DIR))
+
+def _summary_cache_key(formatted_notes: str) -> str:
+    """Key a summary by the model, its sampling settings, every prompt and the exact notes it was generated from."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (
+        settings.MODEL_NAME,
+        repr(SUMMARY_TEMPERATURE),
+        SUMMARY_SYSTEM_PROMPT,
+        SUMMARY_PROMPT,
+        NOTE_SUMMARY_SYSTEM_PROMPT,
+        NOTE_SUMMARY_PROMPT,
+        formatted_notes,
+    ):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+async def prewarm_llm() -> None:
+    """
+    Send one throwaway summary request so the LLM server loads the model and
+    caches the static instruction prefix before the first real summary.
+    """
+    try:
+        # One output token is enough: only the prompt prefill needs to run
+        await get_llm(temperature=SUMMARY_TEMPERATURE).ainvoke(
+            PROMPT.format_messages(context=""),
+            num_predict=1,
+        )
+        logger.info("LLM prewarmed")
+    except Exception as e:
+        logger.warning(f"Could not prewarm the LLM: {str(e)}")
+
 async def generate_daily_summary() -> str:
     """
     Generate a summary of recent notes and save it to the summaries directory.
@@ -56,15 +136,10 @@ async def generate_daily_summary() -> str:
         
         if not recent_notes:
             summary_text = "No new or updated notes in the last 24 hours."
+            await _save_summary(summary_text)
         else:
-            # 2. Format the notes for summarization
-            formatted_notes = _format_notes_for_summarization(recent_notes)
-            
-            # 3. Generate the summary using the LLM
-            summary_text = await _generate_summary_with_llm(formatted_notes)
-        
-        # 4. Save the summary to a file
-        await _save_summary(summary_text)
+            # 2. Generate the summary using the LLM, saving it to a file as it streams
+            summary_text = await _generate_summary_with_llm(recent_notes)
         
         return summary_text
         
@@ -84,32 +159,20 @@ async def _get_recent_notes(days: int = 1) -> List[Dict[str, Any]]:
         List of recent notes with content and metadata
     """
     try:
-        # Calculate the cutoff date
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        
-        # Search for recent documents
-        recent_docs = await indexer.similarity_search(
-            query="recent updates",  # Generic query to get recent documents
-            k=50,  # Limit the number of results
-            filter={"ingestion_time": {"$gt": cutoff_date}}
-        )
-        
-        # Process and deduplicate results by source
-        seen_sources = set()
-        unique_notes = []
-        
-        for doc in recent_docs:
-            source = doc['metadata'].get('source')
-            if source and source not in seen_sources:
-                seen_sources.add(source)
-                unique_notes.append({
-                    'source': source,
-                    'title': doc['metadata'].get('title', 'Untitled'),
-                    'content': doc['content'],
-                    'last_modified': doc['metadata'].get('last_modified', 'Unknown'),
-                })
+        # Fetch the first chunk of each recently ingested note; filtering on
+        # chunk_id lets Qdrant return one point per note
+        recent_docs = await get_indexer().scroll_recent(recency_cutoff(days), limit=50, first_chunk_only=True)
         
-        return unique_notes
+        return [
+            {
+                'source': metadata['source'],
+                'title': metadata.get('title', 'Untitled'),
+                'content': content,
+                'last_modified': metadata.get('last_modified', 'Unknown'),
+            }
+            for content, metadata in zip(recent_docs.contents, recent_docs.metadatas)
+            if metadata.get('source')
+        ]
         
     except Exception as e:
         logger.error(f"Error fetching recent notes: {str(e)}", exc_info=True)
@@ -125,49 +188,129 @@ def _format_notes_for_summarization(notes: List[Dict[str, Any]]) -> str:
     Returns:
         Formatted string of notes
     """
-    formatted_notes = []
+    # No indentation in the template: every leading space would be a prompt token
+    return "\n\n".join(
+        f"--- Note {i}: {note.get('title', 'Untitled')} ---\n"
+        f"Source: {note.get('source', 'Unknown')}\n"
+        f"Last Modified: {note.get('last_modified', 'Unknown')}\n\n"
+        f"{note.get('content', '')}"
+        for i, note in enumerate(notes, 1)
+    )
+
+async def _summarize_each_note(notes: List[Dict[str, Any]]) -> List[str]:
+    """
+    Condense each note separately, running up to SUMMARY_CONCURRENCY LLM calls at once.
+    
+    Args:
+        notes: List of note dictionaries with content and metadata
+        
+    Returns:
+        One condensed summary per note, in the same order
+    """
+    semaphore = asyncio.Semaphore(settings.SUMMARY_CONCURRENCY)
+    chain = _get_note_summary_chain()
     
-    for i, note in enumerate(notes, 1):
-        formatted_note = f"""
-        --- Note {i}: {note.get('title', 'Untitled')} ---
-        Source: {note.get('source', 'Unknown')}
-        Last Modified: {note.get('last_modified', 'Unknown')}
-        
-        {note.get('content', '')}
-        """
-        formatted_notes.append(formatted_note)
+    async def summarize(note: Dict[str, Any]) -> str:
+        async with semaphore:
+            summary = await chain.ainvoke(_format_notes_for_summarization([note]))
+            return summary.strip()
     
-    return "\n\n".join(formatted_notes)
+    return await asyncio.gather(*(summarize(note) for note in notes))
 
-async def _generate_summary_with_llm(formatted_notes: str) -> str:
+async def _generate_summary_with_llm(notes: List[Dict[str, Any]]) -> str:
     """
-    Generate a summary using the LLM.
+    Generate a summary using the LLM and save it to the summaries directory.
+    
+    Multiple notes are summarized map-reduce style: each note is condensed
+    concurrently, then the condensed notes are combined in a final call whose
+    output is streamed to the summary file.
     
     Args:
-        formatted_notes: Formatted string of notes to summarize
+        notes: List of note dictionaries with content and metadata
         
     Returns:
         Generated summary text
     """
     try:
-        # Set up the summarization chain
-        prompt = ChatPromptTemplate.from_template(SUMMARY_PROMPT)
-        
-        chain = (
-            {"context": lambda x: x}
-            | prompt
-            | llm
-            | StrOutputParser()
-        )
+        formatted_notes = _format_notes_for_summarization(notes)
+        
+        # Reuse the summary if these exact notes were already summarized
+        cache = _get_summary_cache()
+        cache_key = _summary_cache_key(formatted_notes)
+        cached_summary = cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("Summary cache hit")
+            await _save_summary(cached_summary)
+            return cached_summary
+        
+        # Map: condense each note, keeping its title and source for the final pass
+        if len(notes) > 1:
+            note_summaries = await _summarize_each_note(notes)
+            formatted_notes = _format_notes_for_summarization([
+                {**note, 'content': note_summary}
+                for note, note_summary in zip(notes, note_summaries)
+            ])
         
-        # Generate the summary
-        summary = await chain.ainvoke(formatted_notes)
-        return summary.strip()
+        # Reduce: generate the summary, writing it to disk as tokens arrive
+        summary = await _stream_summary_to_file(_get_summary_chain().astream(formatted_notes))
+        cache.set(cache_key, summary, expire=settings.SUMMARY_CACHE_TTL)
+        return summary
         
     except Exception as e:
         logger.error(f"Error generating summary with LLM: {str(e)}", exc_info=True)
         return f"Error generating summary: {str(e)}"
 
+def _new_summary_file() -> Tuple[Path, str]:
+    """
+    Choose a timestamped file in the summaries directory for a new summary.
+    
+    Returns:
+        The file path and the header to write at the top of the file
+    """
+    global _summaries_dir_ready
+    
+    # Create the summaries directory if it doesn't exist
+    if _summaries_dir_ready != settings.SUMMARIES_DIR:
+        settings.SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
+        _summaries_dir_ready = settings.SUMMARIES_DIR
+    
+    now = datetime.now()
+    filepath = settings.SUMMARIES_DIR / f"summary_{now.strftime('%Y-%m-%d_%H-%M-%S')}.md"
+    header = f"# Daily Summary - {now.strftime('%Y-%m-%d %H:%M')}\n\n"
+    return filepath, header
+
+async def _stream_summary_to_file(chunks: AsyncIterator[str]) -> str:
+    """
+    Write summary chunks to a new file in the summaries directory as they arrive.
+    
+    Args:
+        chunks: Summary text as it is generated
+        
+    Returns:
+        The full summary text, without surrounding whitespace
+    """
+    filepath, header = _new_summary_file()
+    parts = []
+    
+    try:
+        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
+            await f.write(header)
+            async for chunk in chunks:
+                # Drop leading whitespace the model emits before the summary starts
+                if not parts:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                parts.append(chunk)
+                await f.write(chunk)
+    except BaseException:
+        # Never leave a header-only or truncated summary behind when generation fails
+        filepath.unlink(missing_ok=True)
+        raise
+    
+    logger.info(f"Summary saved to {filepath}")
+    return "".join(parts).rstrip()
+
 async def _save_summary(summary_text: str) -> None:
     """
     Save the summary to a file in the summaries directory.
@@ -176,18 +319,12 @@ async def _save_summary(summary_text: str) -> None:
         summary_text: The summary text to save
     """
     try:
-        # Create the summaries directory if it doesn't exist
-        settings.SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Generate a filename with the current date and time
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"summary_{timestamp}.md"
-        filepath = settings.SUMMARIES_DIR / filename
+        filepath, header = _new_summary_file()
         
-        # Write the summary to the file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# Daily Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n")
-            f.write(summary_text)
+        # Write the summary to the file without blocking the event loop
+        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
+            await f.write(header)
+            await f.write(summary_text)
         
         logger.info(f"Summary saved to {filepath}")
         
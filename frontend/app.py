@@ -1,9 +1,12 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import json
+import orjson
 
 # Configure the page
 st.set_page_config(
@@ -44,22 +47,50 @@ if "show_summary" not in st.session_state:
     st.session_state.show_summary = False
 
 # Helper functions
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Return an HTTP session that reuses connections to the API across reruns."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=2, backoff_factor=0.1),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def call_api(endpoint: str, method: str = "get", data: Optional[Dict] = None):
     """Helper function to make API calls."""
     url = f"{API_BASE_URL}/api/v1{endpoint}"
+    session = get_session()
     try:
         if method.lower() == "get":
-            response = requests.get(url, params=data)
+            response = session.get(url, params=data)
         elif method.lower() == "post":
-            response = requests.post(url, json=data)
+            response = session.post(
+                url,
+                data=orjson.dumps(data) if data is not None else None,
+                headers={"Content-Type": "application/json"},
+            )
         else:
             return {"error": f"Unsupported method: {method}"}
         
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         return {"error": str(e)}
 
+@st.cache_data(ttl=10, show_spinner=False)
+def cached_status():
+    """Fetch the system status, reusing it for a few seconds across widget interactions."""
+    return call_api("/status")
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_ask(question: str):
+    """Ask a question, reusing the answer while reruns repeat the same question."""
+    return call_api("/ask", "get", {"q": question})
+
 # Sidebar
 with st.sidebar:
     st.title("🔍 Navigation")
@@ -95,7 +126,9 @@ with st.sidebar:
     
     # System Status
     st.subheader("System Status")
-    status = call_api("/status")
+    if st.button("🔁 Refresh Status"):
+        cached_status.clear()
+    status = cached_status()
     if "error" in status:
         st.error(f"Error: {status['error']}")
     else:
@@ -144,9 +177,10 @@ elif nav_option == "Recent Updates":
     st.markdown("<h2 class='sub-header'>Recent Updates</h2>", unsafe_allow_html=True)
     
     with st.spinner("Loading recent updates..."):
-        updates = call_api("/ask", "get", {"q": "Show me recent updates"})
+        updates = cached_ask("Show me recent updates")
         
         if "error" in updates:
+            cached_ask.clear()  # Don't keep serving a failed request
             st.error(f"Error: {updates['error']}")
         else:
             if not updates.get("answer"):
@@ -178,7 +212,7 @@ else:  # Knowledge Base Status
     
     with col1:
         st.markdown("### System Information")
-        status = call_api("/status")
+        status = cached_status()
         
         if "error" in status:
             st.error(f"Error: {status['error']}")
@@ -202,7 +236,7 @@ else:  # Knowledge Base Status
         
         if st.button("📊 View Collection Stats"):
             with st.spinner("Fetching collection statistics..."):
-                stats = call_api("/status")  # This would need a proper stats endpoint
+                stats = cached_status()  # This would need a proper stats endpoint
                 if "error" in stats:
                     st.error(f"Error: {stats['error']}")
                 else:
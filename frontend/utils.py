@@ -1,11 +1,24 @@
 import os
 import json
+import orjson
 from typing import Dict, Any, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Get API base URL from environment or use default
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# Shared session so repeated calls reuse pooled connections to the API
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.1),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
 def call_api(
     endpoint: str, 
     method: str = "get", 
@@ -29,15 +42,16 @@ def call_api(
     
     try:
         if method.lower() == "get":
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = _SESSION.get(url, params=params, headers=headers, timeout=30)
         elif method.lower() == "post":
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            body = orjson.dumps(data) if data is not None else None
+            response = _SESSION.post(url, data=body, headers=headers, timeout=30)
         else:
             return {"error": f"Unsupported method: {method}"}
         
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         return {"error": str(e)}
 
 def format_chat_message(role: str, content: str) -> Dict[str, str]:
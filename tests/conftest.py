@@ -1,8 +1,11 @@
+import asyncio
 import os
 import sys
 import pytest
+from dataclasses import dataclass
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,6 +17,14 @@ from backend.config import settings
 settings.TESTING = True
 settings.QDRANT_URL = "http://test-qdrant:6333"
 settings.OLLAMA_BASE_URL = "http://test-ollama:11434"
+settings.PREWARM_LLM = False
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Share one event loop across the session instead of creating one per async test."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
 @pytest.fixture(scope="module")
 def client():
@@ -21,23 +32,57 @@ def client():
     with TestClient(app) as test_client:
         yield test_client
 
+@dataclass
+class IndexerMocks:
+    """Mocks patched over the client classes VectorIndexer constructs."""
+    qdrant: MagicMock
+    async_qdrant: MagicMock
+    chunk_store: MagicMock
+    embeddings: MagicMock
+
+@pytest.fixture(scope="session")
+def _indexer_patches():
+    """Patch the indexer's client classes once for the whole session."""
+    with patch('backend.rag.indexer.QdrantClient') as qdrant, \
+            patch('backend.rag.indexer.AsyncQdrantClient') as async_qdrant, \
+            patch('backend.rag.indexer.ChunkStore') as chunk_store, \
+            patch('backend.rag.indexer.FastEmbedEmbeddings') as embeddings:
+        yield IndexerMocks(qdrant, async_qdrant, chunk_store, embeddings)
+
+@pytest.fixture(scope="session")
+def _ollama_patch():
+    """Patch the chat model class once for the whole session."""
+    with patch('backend.deps.ChatOllama') as mock_ollama:
+        yield mock_ollama
+
+def _reset(mock: MagicMock) -> MagicMock:
+    """Clear calls and configured return values so nothing leaks between tests."""
+    mock.reset_mock(return_value=True, side_effect=True)
+    return mock
+
+@pytest.fixture
+def indexer_mocks(_indexer_patches):
+    """Session-wide indexer mocks, reset for each test."""
+    for mock in vars(_indexer_patches).values():
+        _reset(mock)
+    return _indexer_patches
+
 @pytest.fixture
-def mock_qdrant():
+def mock_qdrant(indexer_mocks):
     """Mock Qdrant client for testing."""
-    with patch('backend.rag.indexer.QdrantClient') as mock_qdrant:
-        yield mock_qdrant
+    return indexer_mocks.qdrant
 
 @pytest.fixture
-def mock_ollama():
-    """Mock Ollama client for testing."""
-    with patch('backend.services.qa.ChatOllama') as mock_ollama:
-        yield mock_ollama
+def mock_ollama(_ollama_patch):
+    """Mock Ollama client for testing; ainvoke is awaitable like the real chat model's."""
+    _reset(_ollama_patch)
+    _ollama_patch.return_value.ainvoke = AsyncMock(return_value=SimpleNamespace(content="Test answer"))
+    return _ollama_patch
 
 @pytest.fixture
-def mock_embeddings():
-    """Mock HuggingFace embeddings for testing."""
-    with patch('backend.rag.indexer.HuggingFaceEmbeddings') as mock_embeddings:
-        yield mock_embeddings
+def mock_embeddings(indexer_mocks):
+    """Mock fastembed embeddings for testing."""
+    return indexer_mocks.embeddings
 
 @pytest.fixture
 def test_document():
@@ -1,6 +1,6 @@
 import pytest
 from fastapi import status
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 class TestAPIEndpoints:
     """Test cases for the API endpoints."""
@@ -11,7 +11,7 @@ class TestAPIEndpoints:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {"status": "healthy"}
     
-    @patch('backend.services.qa.get_qa_response')
+    @patch('backend.api.routes.get_qa_response')
     def test_ask_endpoint(self, mock_qa, client):
         """Test the ask endpoint."""
         # Mock the QA response
@@ -25,7 +25,49 @@ class TestAPIEndpoints:
         assert response.json() == {"question": "test question", "answer": "This is a test answer."}
         mock_qa.assert_called_once_with("test question", limit=5)
     
-    @patch('backend.services.summarizer.generate_daily_summary')
+    @patch('backend.api.routes.stream_qa_response')
+    def test_ask_stream_endpoint(self, mock_stream, client):
+        """Test that streamed answers are framed as server-sent events."""
+        # Mock the streamed events, including a token spanning two lines
+        async def events(question, limit):
+            yield "token", "Hello"
+            yield "token", " world\n- point"
+            yield "done", "Sources: test.md"
+        mock_stream.side_effect = events
+        
+        # Make the request
+        response = client.get("/api/v1/ask/stream?q=test+question&limit=3")
+        
+        # Assertions
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.text == (
+            "data: Hello\n\n"
+            "data:  world\ndata: - point\n\n"
+            "event: done\ndata: Sources: test.md\n\n"
+        )
+        mock_stream.assert_called_once_with("test question", limit=3)
+    
+    @patch('backend.api.routes.stream_qa_response')
+    def test_ask_stream_endpoint_error(self, mock_stream, client):
+        """Test that a failed answer ends the stream with an error event."""
+        # Mock the service reporting an error
+        async def events(question, limit):
+            yield "error", "I encountered an error while processing your question: boom"
+        mock_stream.side_effect = events
+        
+        # Make the request
+        response = client.get("/api/v1/ask/stream?q=test+question")
+        
+        # Assertions
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text == (
+            "event: error\n"
+            "data: I encountered an error while processing your question: boom\n\n"
+        )
+    
+    @patch('backend.api.routes.generate_daily_summary')
     def test_summarize_endpoint(self, mock_summary, client):
         """Test the summarize endpoint."""
         # Mock the summary response
@@ -65,14 +107,19 @@ class TestAPIEndpoints:
         assert "notes_dir" in data
         assert "summaries_dir" in data
     
-    @patch('backend.services.loader.load_documents')
-    @patch('backend.rag.indexer.VectorIndexer')
-    def test_ingest_endpoint(self, mock_indexer, mock_loader, client):
+    @patch('backend.services.ingest.load_documents')
+    @patch('backend.services.ingest.get_indexer')
+    def test_ingest_endpoint(self, mock_indexer, mock_loader, client, tmp_path, monkeypatch):
         """Test the ingest endpoint."""
+        from backend.config import settings
+        
+        # Keep the manifest written by the background ingestion out of the data dir
+        monkeypatch.setattr(settings, "MANIFEST_FILE", tmp_path / "manifest.json")
+        
         # Mock the loader and indexer
         test_docs = [{"content": "Test doc", "metadata": {"source": "test.md"}}]
         mock_loader.return_value = test_docs
-        mock_instance = MagicMock()
+        mock_instance = AsyncMock()
         mock_instance.index_documents.return_value = len(test_docs)
         mock_indexer.return_value = mock_instance
         
@@ -83,4 +130,5 @@ class TestAPIEndpoints:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {"status": "ingestion started"}
         mock_loader.assert_called_once()
-        mock_instance.index_documents.assert_called_once()
+        mock_instance.index_documents.assert_awaited_once_with(test_docs)
+        assert (tmp_path / "manifest.json").exists()
@@ -1,106 +1,322 @@
 import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
-from pathlib import Path
+from unittest.mock import MagicMock, Mock, AsyncMock
 from datetime import datetime
 
 class TestVectorIndexer:
     """Test cases for the VectorIndexer class."""
     
     @pytest.fixture
-    def mock_qdrant_client(self):
-        with patch('backend.rag.indexer.QdrantClient') as mock_qdrant:
-            yield mock_qdrant
+    def mock_qdrant_client(self, indexer_mocks):
+        return indexer_mocks.qdrant
     
     @pytest.fixture
-    def mock_embeddings(self):
-        with patch('backend.rag.indexer.HuggingFaceEmbeddings') as mock_embeddings:
-            yield mock_embeddings
+    def mock_async_qdrant_client(self, indexer_mocks):
+        return indexer_mocks.async_qdrant
     
     @pytest.fixture
-    def test_documents(self):
+    def mock_chunk_store(self, indexer_mocks):
+        return indexer_mocks.chunk_store
+    
+    @pytest.fixture
+    def test_documents(self, tmp_path, monkeypatch):
+        from backend.config import settings
         from backend.services.loader import Document
-        return [
-            Document(
-                content="Test document 1 about artificial intelligence",
-                metadata={"source": "test1.md", "title": "AI Document"},
-                source_path=Path("test1.md")
-            ),
-            Document(
-                content="Test document 2 about machine learning",
-                metadata={"source": "test2.md", "title": "ML Document"},
-                source_path=Path("test2.md")
-            )
-        ]
-    
-    @pytest.mark.asyncio
-    async def test_index_documents(self, mock_qdrant_client, mock_embeddings, test_documents):
+        
+        # Source paths must exist under the notes directory
+        monkeypatch.setattr(settings, "NOTES_DIR", tmp_path)
+        contents = {
+            "test1.md": ("Test document 1 about artificial intelligence", "AI Document"),
+            "test2.md": ("Test document 2 about machine learning", "ML Document"),
+        }
+        documents = []
+        for name, (content, title) in contents.items():
+            source_path = tmp_path / name
+            source_path.write_text(content)
+            documents.append(Document(content=content, metadata={"title": title}, source_path=source_path))
+        return documents
+    
+    async def test_index_documents(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings, test_documents):
         """Test indexing documents into the vector store."""
         from backend.rag.indexer import VectorIndexer
         
         # Mock the Qdrant client
-        mock_client = MagicMock()
-        mock_qdrant_client.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
         mock_client.get_collections.return_value.collections = []
         
         # Create the indexer
         indexer = VectorIndexer()
         
-        # Mock the vector store
-        mock_vector_store = AsyncMock()
-        with patch('backend.rag.indexer.Qdrant', return_value=mock_vector_store):
-            # Mock the add_documents method
-            mock_vector_store.aadd_documents.return_value = ["doc1", "doc2"]
-            
-            # Call the method
-            result = await indexer.index_documents(test_documents)
-            
-            # Assertions
-            assert result == 2
-            mock_client.create_collection.assert_called_once()
-            mock_vector_store.aadd_documents.assert_awaited_once()
+        # Mock the batched embedding call
+        mock_embeddings.return_value.embed_documents.return_value = [[0.1] * 384, [0.2] * 384]
+        
+        # Call the method
+        result = await indexer.index_documents(test_documents)
+        
+        # Assertions
+        assert result == 2
+        mock_client.create_collection.assert_awaited_once()
+        mock_embeddings.return_value.embed_documents.assert_called_once()
+        mock_client.upsert.assert_awaited_once()
+        mock_chunk_store.return_value.put_many.assert_called_once()
+        
+        # Chunk text is kept out of the Qdrant payload
+        points = mock_client.upsert.call_args.kwargs["points"]
+        assert all("page_content" not in point.payload for point in points)
+        assert {point.payload["metadata"]["source"] for point in points} == {"test1.md", "test2.md"}
     
-    @pytest.mark.asyncio
-    async def test_similarity_search(self, mock_qdrant_client, mock_embeddings):
+    async def test_index_documents_waits_for_last_batch(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings, test_documents, monkeypatch):
+        """Test that indexing returns only once Qdrant has applied the final upsert batch."""
+        from backend.rag.indexer import VectorIndexer
+        
+        # One point per upsert batch
+        monkeypatch.setattr("backend.rag.indexer.UPSERT_BATCH_SIZE", 1)
+        
+        # Mock the Qdrant client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        mock_client.get_collections.return_value.collections = []
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Mock the batched embedding call
+        mock_embeddings.return_value.embed_documents.return_value = [[0.1] * 384, [0.2] * 384]
+        
+        # Call the method
+        await indexer.index_documents(test_documents)
+        
+        # Assertions
+        assert [call.kwargs["wait"] for call in mock_client.upsert.call_args_list] == [False, True]
+    
+    @pytest.mark.parametrize("stored, expected", [
+        (["Stored content"], 1),
+        ([None], 2),
+    ])
+    async def test_index_documents_skips_only_fully_stored_documents(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings, test_documents, stored, expected):
+        """Test that an unchanged document is reindexed when its text is missing from the chunk store."""
+        from backend.config import settings
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock an existing collection that already holds the first document
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        existing = MagicMock()
+        existing.name = settings.QDRANT_COLLECTION
+        mock_client.get_collections.return_value.collections = [existing]
+        mock_record = Mock(spec=["payload"])
+        mock_record.payload = {"metadata": {"doc_id": test_documents[0].doc_id, "total_chunks": 1}}
+        mock_client.scroll.side_effect = [([mock_record], None), ([], None)]
+        mock_chunk_store.return_value.get_many.return_value = stored
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Mock the batched embedding call
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+        
+        # Call the method
+        result = await indexer.index_documents(test_documents)
+        
+        # Assertions
+        assert result == expected
+        mock_chunk_store.return_value.get_many.assert_called_once_with([(test_documents[0].doc_id, 0)])
+    
+    async def test_similarity_search(self, mock_qdrant_client, mock_async_qdrant_client, mock_embeddings):
         """Test performing a similarity search."""
         from backend.rag.indexer import VectorIndexer
         
         # Mock the Qdrant client
-        mock_client = MagicMock()
-        mock_qdrant_client.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
         mock_client.get_collections.return_value.collections = [MagicMock(name="test_collection")]
         
         # Create the indexer
         indexer = VectorIndexer()
         
-        # Mock the vector store
-        mock_vector_store = AsyncMock()
-        with patch('backend.rag.indexer.Qdrant', return_value=mock_vector_store):
-            # Mock the similarity search
-            mock_doc = MagicMock()
-            mock_doc.page_content = "Test content"
-            mock_doc.metadata = {"source": "test.md", "title": "Test"}
-            mock_vector_store.asimilarity_search_with_score.return_value = [
-                (mock_doc, 0.9)
-            ]
-            
-            # Call the method
-            results = await indexer.similarity_search("test query", k=1)
-            
-            # Assertions
-            assert len(results) == 1
-            assert results[0]["content"] == "Test content"
-            assert results[0]["metadata"]["source"] == "test.md"
-            assert results[0]["score"] == 0.9
-            mock_vector_store.asimilarity_search_with_score.assert_awaited_once()
-    
-    @pytest.mark.asyncio
-    async def test_get_collection_info(self, mock_qdrant_client, mock_embeddings):
+        # Mock the query embedding and search response
+        mock_embeddings.return_value.embed_query.return_value = [0.1] * 384
+        mock_point = Mock(spec=["payload", "score"])
+        mock_point.payload = {
+            "page_content": "Test content",
+            "metadata": {"source": "test.md", "title": "Test"},
+        }
+        mock_point.score = 0.9
+        mock_client.query_points.return_value.points = [mock_point]
+        
+        # Call the method
+        results = await indexer.similarity_search("test query", k=1)
+        
+        # Assertions
+        assert len(results) == 1
+        assert results.contents[0] == "Test content"
+        assert results.metadatas[0]["source"] == "test.md"
+        assert results.scores[0] == pytest.approx(0.9)
+        mock_client.query_points.assert_awaited_once()
+    
+    async def test_embedding_model_loads_off_event_loop(self, mock_qdrant_client, mock_async_qdrant_client, mock_embeddings):
+        """Test that the embedding model is built in the embedding pool rather than on the event loop."""
+        import threading
+        from backend.rag.indexer import VectorIndexer
+        
+        # Record the thread that builds the model
+        loaded_on = []
+        def load_model(**kwargs):
+            loaded_on.append(threading.current_thread().name)
+            return MagicMock()
+        mock_embeddings.side_effect = load_model
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method
+        await indexer.embed_query("test query")
+        
+        # Assertions
+        assert len(loaded_on) == 1
+        assert loaded_on[0].startswith("embed")
+    
+    async def test_similarity_search_bypass_embedding(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings):
+        """Test that a filter-only search scrolls instead of embedding the query."""
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock the Qdrant client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        mock_client.get_collections.return_value.collections = []
+        mock_client.scroll.return_value = ([], None)
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method
+        results = await indexer.similarity_search(
+            "recent updates",
+            k=5,
+            filter={"source": "test.md"},
+            bypass_embedding=True,
+        )
+        
+        # Assertions
+        assert len(results) == 0
+        mock_client.scroll.assert_awaited_once()
+        mock_client.query_points.assert_not_awaited()
+        mock_embeddings.return_value.embed_query.assert_not_called()
+    
+    async def test_scroll_recent(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings):
+        """Test fetching recent chunks by payload filter without embedding a query."""
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock the Qdrant client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        mock_client.get_collections.return_value.collections = []
+        
+        # Mock one scrolled record whose text lives in the chunk store
+        mock_record = Mock(spec=["payload"])
+        mock_record.payload = {"metadata": {"source": "test.md", "doc_id": "abc", "chunk_id": 0}}
+        mock_client.scroll.return_value = ([mock_record], None)
+        mock_chunk_store.return_value.get_many.return_value = ["Stored content"]
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method
+        results = await indexer.scroll_recent(cutoff_time=1000.0, limit=10)
+        
+        # Assertions
+        assert results.contents == ["Stored content"]
+        assert results.metadatas[0]["source"] == "test.md"
+        scroll_kwargs = mock_client.scroll.call_args.kwargs
+        assert scroll_kwargs["with_vectors"] is False
+        assert scroll_kwargs["scroll_filter"].must[0].range.gt == 1000.0
+        mock_embeddings.return_value.embed_query.assert_not_called()
+    
+    async def test_scroll_recent_skips_chunks_missing_from_store(self, mock_qdrant_client, mock_async_qdrant_client, mock_chunk_store, mock_embeddings):
+        """Test that a record whose text is missing from the chunk store is dropped rather than returned empty."""
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock the Qdrant client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        mock_client.get_collections.return_value.collections = []
+        
+        # Mock two scrolled records, only the second of which has stored text
+        records = []
+        for source, doc_id in [("missing.md", "abc"), ("test.md", "def")]:
+            mock_record = Mock(spec=["payload"])
+            mock_record.payload = {"metadata": {"source": source, "doc_id": doc_id, "chunk_id": 0}}
+            records.append(mock_record)
+        mock_client.scroll.return_value = (records, None)
+        mock_chunk_store.return_value.get_many.return_value = [None, "Stored content"]
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method
+        results = await indexer.scroll_recent(cutoff_time=1000.0, limit=10)
+        
+        # Assertions
+        assert len(results) == 1
+        assert results.contents == ["Stored content"]
+        assert results.metadatas[0]["source"] == "test.md"
+        assert len(results.scores) == 1
+    
+    async def test_ensure_collection_creates_once_under_concurrency(self, mock_qdrant_client, mock_async_qdrant_client, mock_embeddings):
+        """Test that concurrent first calls create the collection only once."""
+        import asyncio
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock the Qdrant client with no collections yet, yielding to the event loop like a real request
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        
+        async def get_collections():
+            await asyncio.sleep(0)
+            return MagicMock(collections=[])
+        mock_client.get_collections.side_effect = get_collections
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method from several requests at once
+        await asyncio.gather(*(indexer.ensure_collection() for _ in range(3)))
+        
+        # Assertions
+        mock_client.get_collections.assert_awaited_once()
+        mock_client.create_collection.assert_awaited_once()
+    
+    async def test_ensure_collection_updates_existing_index_config(self, mock_qdrant_client, mock_async_qdrant_client, mock_embeddings):
+        """Test that an existing collection built with other HNSW settings is updated."""
+        from backend.config import settings
+        from backend.rag.indexer import VectorIndexer
+        
+        # Mock an existing collection with outdated HNSW parameters
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
+        existing = MagicMock()
+        existing.name = settings.QDRANT_COLLECTION
+        mock_client.get_collections.return_value.collections = [existing]
+        mock_client.get_collection.return_value.config.hnsw_config.m = settings.HNSW_M * 2
+        
+        # Create the indexer
+        indexer = VectorIndexer()
+        
+        # Call the method
+        await indexer.ensure_collection()
+        
+        # Assertions
+        mock_client.create_collection.assert_not_awaited()
+        hnsw_config = mock_client.update_collection.call_args.kwargs["hnsw_config"]
+        assert hnsw_config.m == settings.HNSW_M
+    
+    async def test_get_collection_info(self, mock_qdrant_client, mock_async_qdrant_client, mock_embeddings):
         """Test getting collection information."""
         from backend.rag.indexer import VectorIndexer
         
         # Mock the Qdrant client
-        mock_client = MagicMock()
-        mock_qdrant_client.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_qdrant_client.return_value = mock_client
         
         # Mock the collection info
         mock_collection = MagicMock()
@@ -123,4 +339,87 @@ class TestVectorIndexer:
             "vectors_count": 100,
             "points_count": 100,
         }
-        mock_client.get_collection.assert_called_once_with(collection_name=indexer.collection_name)
+        mock_client.get_collection.assert_awaited_once_with(collection_name=indexer.collection_name)
+
+class TestFastSplit:
+    """Test cases for the paragraph-based text splitter."""
+    
+    def test_merges_paragraphs_up_to_size(self):
+        """Test that short paragraphs are merged and chunks respect the size limit."""
+        from backend.rag.indexer import _fast_split
+        
+        text = "\n\n".join(["alpha", "beta", "gamma", "delta"])
+        chunks = _fast_split(text, size=12, overlap=0)
+        
+        # Assertions
+        assert chunks == ["alpha\n\nbeta", "gamma\n\ndelta"]
+        assert all(len(chunk) <= 12 for chunk in chunks)
+    
+    def test_splits_oversized_paragraph_with_overlap(self):
+        """Test that a paragraph longer than the size is cut into overlapping windows."""
+        from backend.rag.indexer import _fast_split
+        
+        chunks = _fast_split("x" * 25, size=10, overlap=3)
+        
+        # Assertions
+        assert all(len(chunk) <= 10 for chunk in chunks)
+        assert sum(len(chunk) for chunk in chunks) >= 25
+
+class TestRecencyFilter:
+    """Test cases for the recency filter helpers."""
+    
+    def test_recency_filter(self):
+        """Test that the filter matches chunks ingested after the cutoff."""
+        from backend.rag.indexer import FIRST_CHUNK_CONDITION, recency_cutoff, recency_filter
+        
+        cutoff = recency_cutoff(days=1)
+        qdrant_filter = recency_filter(cutoff, first_chunk_only=True)
+        
+        # Assertions
+        assert qdrant_filter.must[0].key == "metadata.ingestion_time"
+        assert qdrant_filter.must[0].range.gt == cutoff
+        assert qdrant_filter.must[1] is FIRST_CHUNK_CONDITION
+        assert len(recency_filter(cutoff).must) == 1
+
+class TestSharedIndexer:
+    """Test cases for the process-wide indexer."""
+    
+    def test_get_indexer_returns_one_instance(self, indexer_mocks):
+        """Test that every caller shares a single VectorIndexer and its clients."""
+        from backend.deps import get_indexer
+        
+        get_indexer.cache_clear()
+        try:
+            # Assertions
+            assert get_indexer() is get_indexer()
+            indexer_mocks.async_qdrant.assert_called_once()
+        finally:
+            get_indexer.cache_clear()
+
+class TestQueryBatcher:
+    """Test cases for the query batcher."""
+    
+    async def test_stop_fails_in_flight_batch(self):
+        """Test that stopping mid-request fails queries already taken off the queue."""
+        import asyncio
+        from backend.rag.batcher import QueryBatcher
+        
+        # Mock a batched request that never completes
+        request_sent = asyncio.Event()
+        async def hang(**kwargs):
+            request_sent.set()
+            await asyncio.Event().wait()
+        mock_client = AsyncMock()
+        mock_client.query_batch_points.side_effect = hang
+        
+        batcher = QueryBatcher(mock_client, "test_collection", window_ms=0)
+        batcher.start()
+        query = asyncio.create_task(batcher.submit(MagicMock()))
+        await request_sent.wait()
+        
+        # Call the method
+        await batcher.stop()
+        
+        # Assertions
+        with pytest.raises(RuntimeError, match="Query batcher stopped"):
+            await asyncio.wait_for(query, timeout=1)
@@ -1,142 +1,584 @@
+import json
 import pytest
+from contextlib import ExitStack
+from types import SimpleNamespace
+from typing import NamedTuple, Tuple
 from unittest.mock import patch, MagicMock, AsyncMock
-from datetime import datetime, timedelta
 
+import numpy as np
+
+from backend.config import settings
+from backend.deps import get_llm
+from backend.rag.indexer import FIRST_CHUNK_CONDITION, SearchBatch
+from backend.services.cache import SemanticCache
+from backend.services.ingest import run_ingestion
+from backend.services.loader import load_documents, Document, Manifest
+from backend.services.qa import get_qa_response, stream_qa_response, get_recent_updates
+from backend.services.summarizer import (
+    SUMMARY_SYSTEM_PROMPT,
+    generate_daily_summary,
+    prewarm_llm,
+    _format_notes_for_summarization,
+    _generate_summary_with_llm,
+    _stream_summary_to_file,
+    _summary_cache_key,
+)
+
+class Ready:
+    """Awaitable that resolves to a fixed value without creating a coroutine."""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def __await__(self):
+        return self.value
+        yield  # Makes __await__ a generator, as the await protocol requires
+
+# Search results shared by the QA tests; SearchBatch is never mutated by the service
+SINGLE_HIT = SearchBatch(
+    scores=np.array([0.9], dtype=np.float32),
+    contents=['Test context'],
+    metadatas=[{'source': 'test.md'}],
+)
+
+NO_HITS = SearchBatch(
+    scores=np.array([], dtype=np.float32),
+    contents=[],
+    metadatas=[],
+)
+
+@pytest.mark.xdist_group(name="qa")
 class TestQAService:
     """Test cases for the QA service."""
     
-    @pytest.mark.asyncio
-    @patch('backend.services.qa.VectorIndexer')
-    @patch('backend.services.qa.ChatOllama')
-    async def test_get_qa_response(self, mock_llm, mock_indexer):
-        """Test getting a QA response with context."""
-        from backend.services.qa import get_qa_response
-        
-        # Mock the vector indexer
-        mock_indexer_instance = MagicMock()
-        mock_indexer_instance.similarity_search.return_value = [
-            {
-                'content': 'Test context',
-                'metadata': {'source': 'test.md'},
-                'score': 0.9
-            }
-        ]
-        mock_indexer.return_value = mock_indexer_instance
+    @pytest.fixture
+    def qa_mocks(self, monkeypatch):
+        """Patch the QA service's indexer, chain and semantic cache with pre-wired mocks."""
+        indexer = AsyncMock()
+        indexer.similarity_search.return_value = SINGLE_HIT
         
-        # Mock the LLM response
-        mock_llm_instance = MagicMock()
-        mock_llm_instance.ainvoke.return_value.content = "Test answer"
-        mock_llm.return_value = mock_llm_instance
+        chain = MagicMock()
+        chain.ainvoke.return_value = Ready("Test answer")
+        
+        # Semantic cache miss by default
+        cache = MagicMock()
+        cache.get.return_value = None
+        
+        monkeypatch.setattr('backend.services.qa.get_indexer', lambda: indexer)
+        monkeypatch.setattr('backend.services.qa._get_qa_chain', lambda: chain)
+        monkeypatch.setattr('backend.services.qa.qa_cache', cache)
+        return SimpleNamespace(indexer=indexer, chain=chain, cache=cache)
+    
+    async def test_get_qa_response(self, qa_mocks):
+        """Test getting a QA response with context."""
         
         # Call the function
         response = await get_qa_response("Test question")
         
         # Assertions
         assert "Test answer" in response
-        mock_indexer_instance.similarity_search.assert_called_once()
-        mock_llm_instance.ainvoke.assert_called_once()
+        assert qa_mocks.indexer.similarity_search.call_count == 1
+        chain_input = qa_mocks.chain.ainvoke.call_args.args[0]
+        assert chain_input["question"] == "Test question"
+        assert "Test context" in chain_input["context"]
     
-    @pytest.mark.asyncio
-    @patch('backend.services.qa.VectorIndexer')
-    async def test_get_qa_response_no_results(self, mock_indexer):
+    async def test_get_qa_response_no_results(self, qa_mocks):
         """Test getting a QA response when no results are found."""
-        from backend.services.qa import get_qa_response
         
         # Mock the vector indexer to return no results
-        mock_indexer_instance = MagicMock()
-        mock_indexer_instance.similarity_search.return_value = []
-        mock_indexer.return_value = mock_indexer_instance
+        qa_mocks.indexer.similarity_search.return_value = NO_HITS
         
         # Call the function
         response = await get_qa_response("Test question")
         
         # Assertions
         assert "I couldn't find any relevant information" in response
-        mock_indexer_instance.similarity_search.assert_called_once()
+        assert qa_mocks.indexer.similarity_search.call_count == 1
+        qa_mocks.chain.ainvoke.assert_not_called()
+
+    async def test_get_qa_response_caches_per_limit(self, qa_mocks, monkeypatch):
+        """Test that a cached answer is only reused for the same context limit."""
+        
+        # Use a real semantic cache and a fixed question embedding
+        monkeypatch.setattr('backend.services.qa.qa_cache', SemanticCache(threshold=0.95))
+        qa_mocks.indexer.embed_query.return_value = [1.0, 0.0, 0.0]
+        
+        # Call the function with two limits, then repeat the first
+        await get_qa_response("Test question", limit=1)
+        await get_qa_response("Test question", limit=20)
+        await get_qa_response("Test question", limit=1)
+        
+        # Assertions
+        assert qa_mocks.chain.ainvoke.call_count == 2
+        assert [call.kwargs["k"] for call in qa_mocks.indexer.similarity_search.call_args_list] == [1, 20]
+    
+    async def test_stream_qa_response(self, qa_mocks):
+        """Test streaming answer tokens followed by the sources."""
+        
+        # Mock the chain streaming two tokens
+        async def astream(inputs):
+            for token in ["Test ", "answer"]:
+                yield token
+        qa_mocks.chain.astream = astream
+        
+        # Call the function
+        events = [event async for event in stream_qa_response("Test question")]
+        
+        # Assertions
+        assert events == [
+            ("token", "Test "),
+            ("token", "answer"),
+            ("done", "Sources: test.md"),
+        ]
+        assert qa_mocks.cache.set.call_count == 1
+        assert qa_mocks.cache.set.call_args.args[1] == ("Test answer", "Sources: test.md")
+    
+    async def test_get_recent_updates_dedups_by_source(self, qa_mocks):
+        """Test that recent updates keep the first hit per source in retrieval order."""
+        
+        # Mock hits with a repeated source and one without a source
+        qa_mocks.indexer.similarity_search.return_value = SearchBatch(
+            scores=np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32),
+            contents=['b first', 'a', 'no source', 'b second'],
+            metadatas=[{'source': 'b.md'}, {'source': 'a.md'}, {}, {'source': 'b.md'}],
+        )
+        
+        # Call the function
+        updates = await get_recent_updates(days=7)
+        
+        # Assertions
+        assert [update['source'] for update in updates] == ['b.md', 'a.md']
+        assert updates[0]['snippet'] == 'b first...'
+    
+    async def test_get_recent_updates_lists_every_source(self, qa_mocks):
+        """Test that a note with many chunks does not crowd other notes out of recent updates."""
+        
+        # Mock a 25-chunk note ingested after a single-chunk note, newest first
+        chunks = [{'source': 'long.md', 'chunk_id': i} for i in range(25)] + [{'source': 'short.md', 'chunk_id': 0}]
+        
+        def scroll_newest(query, k, filter, bypass_embedding):
+            metadatas = [metadata for metadata in chunks if FIRST_CHUNK_CONDITION not in filter.must or metadata['chunk_id'] == 0][:k]
+            return SearchBatch(
+                scores=np.zeros(len(metadatas), dtype=np.float32),
+                contents=[f"{metadata['source']} chunk" for metadata in metadatas],
+                metadatas=metadatas,
+            )
+        qa_mocks.indexer.similarity_search.side_effect = scroll_newest
+        
+        # Call the function
+        updates = await get_recent_updates(days=7)
+        
+        # Assertions
+        assert [update['source'] for update in updates] == ['long.md', 'short.md']
+
+@pytest.mark.xdist_group(name="qa")
+class TestSemanticCache:
+    """Test cases for the semantic answer cache."""
+    
+    def test_hit_on_similar_embedding(self):
+        """Test that a near-identical embedding returns the cached value."""
+        
+        cache = SemanticCache(threshold=0.95, maxsize=2)
+        cache.set([1.0, 0.0, 0.0], "cached answer")
+        
+        # Assertions
+        assert cache.get([0.99, 0.05, 0.0]) == "cached answer"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the cache stays bounded by evicting the oldest entry."""
+        
+        cache = SemanticCache(threshold=0.95, maxsize=2)
+        cache.set([1.0, 0.0, 0.0], "first")
+        cache.set([0.0, 1.0, 0.0], "second")
+        cache.get([1.0, 0.0, 0.0])
+        cache.set([0.0, 0.0, 1.0], "third")
+        
+        # Assertions
+        assert len(cache) == 2
+        assert cache.get([1.0, 0.0, 0.0]) == "first"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+    
+    def test_hit_requires_matching_tag(self):
+        """Test that entries only match lookups with the same tag."""
+        
+        cache = SemanticCache(threshold=0.95, maxsize=4)
+        cache.set([1.0, 0.0, 0.0], "five chunks", tag=5)
+        cache.set([1.0, 0.0, 0.0], "twenty chunks", tag=20)
+        
+        # Assertions
+        assert cache.get([1.0, 0.0, 0.0], tag=5) == "five chunks"
+        assert cache.get([1.0, 0.0, 0.0], tag=20) == "twenty chunks"
+        assert cache.get([1.0, 0.0, 0.0], tag=1) is None
+        assert cache.get([1.0, 0.0, 0.0]) is None
+    
+    def test_expired_entry_does_not_shadow_fresh_match(self, monkeypatch):
+        """Test that an expired best match is evicted and the next best fresh entry is returned."""
+        
+        # Mock the clock: an exact match cached long ago and a close match cached recently
+        now = [0.0]
+        monkeypatch.setattr('backend.services.cache.time', SimpleNamespace(monotonic=lambda: now[0]))
+        cache = SemanticCache(threshold=0.95, maxsize=4, ttl=60)
+        cache.set([1.0, 0.0, 0.0], "stale answer")
+        now[0] = 50.0
+        cache.set([0.99, 0.05, 0.0], "fresh answer")
+        now[0] = 70.0
+        
+        # Assertions
+        assert cache.get([1.0, 0.0, 0.0]) == "fresh answer"
+        assert len(cache) == 1
+
+# Recent notes returned to the summarizer tests
+TEST_NOTES = [
+    {
+        'source': 'test1.md',
+        'title': 'Test Note 1',
+        'content': 'Test content 1',
+        'last_modified': '2023-01-01T00:00:00'
+    }
+]
 
+@pytest.mark.xdist_group(name="summarizer")
 class TestSummarizerService:
     """Test cases for the summarizer service."""
     
-    @pytest.mark.asyncio
-    @patch('backend.services.summarizer._get_recent_notes')
-    @patch('backend.services.summarizer._generate_summary_with_llm')
-    @patch('backend.services.summarizer._save_summary')
-    async def test_generate_daily_summary(self, mock_save, mock_generate, mock_recent_notes):
-        """Test generating a daily summary."""
-        from backend.services.summarizer import generate_daily_summary
-        
-        # Mock the recent notes
-        test_notes = [
-            {
-                'source': 'test1.md',
-                'title': 'Test Note 1',
-                'content': 'Test content 1',
-                'last_modified': '2023-01-01T00:00:00'
-            }
+    @pytest.fixture
+    def summarizer_mocks(self):
+        """Patch the summarizer's note source, chains, cache and file writers in one place."""
+        targets = [
+            '_get_recent_notes',
+            '_save_summary',
+            '_stream_summary_to_file',
+            '_get_summary_chain',
+            '_get_note_summary_chain',
+            '_get_summary_cache',
         ]
-        mock_recent_notes.return_value = test_notes
+        with ExitStack() as stack:
+            mocks = SimpleNamespace(**{
+                target.lstrip('_'): stack.enter_context(patch(f'backend.services.summarizer.{target}'))
+                for target in targets
+            })
+            
+            # No recent notes, a summary cache miss and a fixed streamed summary by default
+            mocks.get_recent_notes.return_value = []
+            mocks.get_summary_cache.return_value.get.return_value = None
+            mocks.stream_summary_to_file.return_value = "Test summary"
+            yield mocks
+    
+    @pytest.mark.parametrize("notes, expected", [
+        (TEST_NOTES, "Test summary"),
+        ([], "No new or updated notes"),
+    ])
+    @patch('backend.services.summarizer._generate_summary_with_llm')
+    async def test_generate_daily_summary(self, mock_generate, summarizer_mocks, notes, expected):
+        """Test generating a daily summary, with and without recent notes."""
         
-        # Mock the LLM summary
+        # Mock the recent notes and the LLM summary
+        summarizer_mocks.get_recent_notes.return_value = notes
         mock_generate.return_value = "Test summary"
         
         # Call the function
         summary = await generate_daily_summary()
         
+        # Assertions
+        assert expected in summary
+        summarizer_mocks.get_recent_notes.assert_called_once_with(days=1)
+        if notes:
+            mock_generate.assert_called_once_with(notes)
+            # The generated summary is streamed to its file by _generate_summary_with_llm
+            summarizer_mocks.save_summary.assert_not_called()
+        else:
+            mock_generate.assert_not_called()
+            summarizer_mocks.save_summary.assert_awaited_once_with(summary)
+
+    async def test_generate_summary_uses_cache(self, summarizer_mocks):
+        """Test that identical notes are summarized once and then served from the cache."""
+        
+        # Mock an in-memory cache
+        stored = {}
+        cache = summarizer_mocks.get_summary_cache.return_value
+        cache.get.side_effect = stored.get
+        cache.set.side_effect = lambda key, value, expire: stored.__setitem__(key, value)
+        
+        # Call the function twice with the same notes
+        notes = [{'source': 'test1.md', 'title': 'Test Note 1', 'content': 'Test content 1'}]
+        first = await _generate_summary_with_llm(notes)
+        second = await _generate_summary_with_llm(notes)
+        
+        # Assertions
+        assert first == second == "Test summary"
+        assert summarizer_mocks.get_summary_chain.return_value.astream.call_count == 1
+        summarizer_mocks.stream_summary_to_file.assert_awaited_once()
+        summarizer_mocks.save_summary.assert_awaited_once_with("Test summary")
+    
+    @pytest.mark.parametrize("setting, value", [
+        ("SUMMARY_TEMPERATURE", 0.7),
+        ("SUMMARY_PROMPT", "Summarize:\n{context}"),
+        ("NOTE_SUMMARY_SYSTEM_PROMPT", "Condense this note."),
+        ("NOTE_SUMMARY_PROMPT", "Condense:\n{context}"),
+    ])
+    def test_summary_cache_key_tracks_generation_settings(self, setting, value, monkeypatch):
+        """Test that changing a prompt or the temperature invalidates cached summaries."""
+        
+        key = _summary_cache_key("Test notes")
+        monkeypatch.setattr(f"backend.services.summarizer.{setting}", value)
+        
+        assert _summary_cache_key("Test notes") != key
+    
+    async def test_generate_summary_map_reduce(self, summarizer_mocks):
+        """Test that multiple notes are condensed individually before the final summary."""
+        
+        # Mock the per-note chain
+        note_chain = summarizer_mocks.get_note_summary_chain.return_value
+        note_chain.ainvoke = AsyncMock(side_effect=["Condensed 1", "Condensed 2"])
+        
+        # Call the function
+        notes = [
+            {'source': 'test1.md', 'title': 'Test Note 1', 'content': 'Test content 1'},
+            {'source': 'test2.md', 'title': 'Test Note 2', 'content': 'Test content 2'},
+        ]
+        summary = await _generate_summary_with_llm(notes)
+        
         # Assertions
         assert summary == "Test summary"
-        mock_recent_notes.assert_called_once_with(days=1)
-        mock_generate.assert_called_once()
-        mock_save.assert_called_once_with("Test summary")
+        assert note_chain.ainvoke.await_count == 2
+        reduce_input = summarizer_mocks.get_summary_chain.return_value.astream.call_args.args[0]
+        assert "Condensed 1" in reduce_input and "Condensed 2" in reduce_input
+        assert "Test content 1" not in reduce_input
     
-    @pytest.mark.asyncio
-    @patch('backend.services.summarizer._get_recent_notes')
-    async def test_generate_daily_summary_no_notes(self, mock_recent_notes):
-        """Test generating a daily summary with no recent notes."""
-        from backend.services.summarizer import generate_daily_summary
+    async def test_prewarm_llm(self, mock_ollama):
+        """Test that prewarming awaits one request carrying the summary instructions."""
         
-        # Mock no recent notes
-        mock_recent_notes.return_value = []
+        # Build the chat model from the mocked class rather than a cached instance
+        get_llm.cache_clear()
+        try:
+            # Call the function
+            await prewarm_llm()
+        finally:
+            get_llm.cache_clear()
+        
+        # Assertions
+        mock_ollama.return_value.ainvoke.assert_awaited_once()
+        messages = mock_ollama.return_value.ainvoke.await_args.args[0]
+        assert messages[0].content == SUMMARY_SYSTEM_PROMPT
+        assert mock_ollama.return_value.ainvoke.await_args.kwargs == {"num_predict": 1}
+    
+    def test_format_notes_for_summarization(self):
+        """Test that formatted notes carry no template indentation."""
+        
+        formatted = _format_notes_for_summarization([
+            {'source': 'test1.md', 'title': 'Test Note 1', 'content': 'Test content 1'},
+            {'source': 'test2.md', 'title': 'Test Note 2', 'content': 'Test content 2'},
+        ])
+        
+        assert formatted.startswith("--- Note 1: Test Note 1 ---\nSource: test1.md\n")
+        assert "\n\n--- Note 2: Test Note 2 ---\n" in formatted
+        assert not any(line.startswith(" ") for line in formatted.splitlines())
+    
+    async def test_stream_summary_to_file(self, tmp_path, monkeypatch):
+        """Test that streamed summary chunks are written to a new summary file."""
+        
+        monkeypatch.setattr(settings, "SUMMARIES_DIR", tmp_path)
+        
+        async def chunks():
+            for chunk in ["\n ", "- First", " point\n", "- Second point\n"]:
+                yield chunk
         
         # Call the function
-        summary = await generate_daily_summary()
+        summary = await _stream_summary_to_file(chunks())
         
         # Assertions
-        assert "No new or updated notes" in summary
-        mock_recent_notes.assert_called_once_with(days=1)
+        assert summary == "- First point\n- Second point"
+        [summary_file] = tmp_path.glob("summary_*.md")
+        content = summary_file.read_text(encoding='utf-8')
+        assert content.startswith("# Daily Summary - ")
+        assert content.endswith("\n\n- First point\n- Second point\n")
+    
+    @patch('backend.services.summarizer._get_summary_chain')
+    @patch('backend.services.summarizer._get_summary_cache')
+    async def test_failed_stream_leaves_no_summary_file(self, mock_cache, mock_chain, tmp_path, monkeypatch):
+        """Test that a summary stream failing midway removes its partial file."""
+        
+        monkeypatch.setattr(settings, "SUMMARIES_DIR", tmp_path)
+        mock_cache.return_value.get.return_value = None
+        
+        # Mock the chain failing after the first chunk
+        async def astream(notes):
+            yield "- First point\n"
+            raise ConnectionError("Ollama is unreachable")
+        mock_chain.return_value.astream = astream
+        
+        # Call the function
+        notes = [{'source': 'test1.md', 'title': 'Test Note 1', 'content': 'Test content 1'}]
+        summary = await _generate_summary_with_llm(notes)
+        
+        # Assertions
+        assert summary.startswith("Error generating summary")
+        assert list(tmp_path.glob("summary_*.md")) == []
+        mock_cache.return_value.set.assert_not_called()
 
+class FakeEntry(NamedTuple):
+    """Lightweight stand-in for a file Path yielded by rglob."""
+    name: str
+    suffix: str
+    size: int
+    
+    def is_file(self) -> bool:
+        return True
+    
+    def stat(self) -> SimpleNamespace:
+        return SimpleNamespace(st_size=self.size)
+
+class FakeDirectory(NamedTuple):
+    """Lightweight stand-in for an existing notes directory Path."""
+    entries: Tuple[FakeEntry, ...]
+    
+    def exists(self) -> bool:
+        return True
+    
+    def rglob(self, pattern: str) -> Tuple[FakeEntry, ...]:
+        return self.entries
+
+# Directory listing shared by the loader tests; the .py file is unsupported
+NOTE_ENTRIES = (
+    FakeEntry(name='test1.md', suffix='.md', size=10),
+    FakeEntry(name='test2.txt', suffix='.txt', size=20),
+    FakeEntry(name='ignore.py', suffix='.py', size=30),
+)
+
+# Documents load_document returns for the supported entries. They carry no source
+# path, which would be resolved against NOTES_DIR and stat'ed on construction.
+SAMPLE_DOCS = {
+    'test1.md': Document(content="Test content 1", metadata={"title": "Test 1"}),
+    'test2.txt': Document(content="Test content 2", metadata={"title": "Test 2"}),
+}
+
+@pytest.mark.xdist_group(name="loader")
 class TestLoaderService:
     """Test cases for the document loader service."""
     
-    @pytest.mark.asyncio
-    @patch('backend.services.loader.Path')
-    async def test_load_documents(self, mock_path):
-        """Test loading documents from a directory."""
-        from backend.services.loader import load_documents, Document
-        
-        # Mock the directory structure
-        mock_dir = MagicMock()
-        mock_dir.rglob.return_value = [
-            MagicMock(is_file=MagicMock(return_value=True), suffix='.md', name='test1.md'),
-            MagicMock(is_file=MagicMock(return_value=True), suffix='.txt', name='test2.txt'),
-            MagicMock(is_file=MagicMock(return_value=True), suffix='.py', name='ignore.py'),
-        ]
+    @pytest.fixture(scope="class")
+    def loaded(self):
+        """Load the sample directory once and share the result with the assertion-only tests."""
         
-        # Mock the Path object
-        mock_path.return_value = mock_dir
-        mock_path.return_value.exists.return_value = True
+        # Mock the load_document function, keyed by file name since files load in parallel
+        with patch('backend.services.loader.load_document') as mock_load:
+            mock_load.side_effect = lambda entry: SAMPLE_DOCS[entry.name]
+            docs = load_documents(FakeDirectory(NOTE_ENTRIES))
+        return SimpleNamespace(docs=docs, load_document=mock_load)
+    
+    def test_load_documents_skips_unsupported_files(self, loaded):
+        """Test that only files with supported extensions are loaded."""
+        assert len(loaded.docs) == 2
+        assert loaded.load_document.call_count == 2
+        loaded_names = {call.args[0].name for call in loaded.load_document.call_args_list}
+        assert loaded_names == {'test1.md', 'test2.txt'}
+    
+    def test_load_documents_keeps_discovery_order(self, loaded):
+        """Test that documents are returned in discovery order despite largest-first loading."""
+        assert loaded.docs == [SAMPLE_DOCS['test1.md'], SAMPLE_DOCS['test2.txt']]
+    
+    def test_load_documents_uses_supported_extensions(self, monkeypatch):
+        """Test that the file filter follows SUPPORTED_EXTENSIONS."""
+        monkeypatch.setattr('backend.services.loader.SUPPORTED_EXTENSIONS', frozenset({'.md'}))
         
-        # Mock the load_document function
         with patch('backend.services.loader.load_document') as mock_load:
-            mock_load.side_effect = [
-                Document(content="Test content 1", metadata={"title": "Test 1"}, source_path=Path("test1.md")),
-                Document(content="Test content 2", metadata={"title": "Test 2"}, source_path=Path("test2.txt")),
-            ]
+            mock_load.side_effect = lambda entry: SAMPLE_DOCS[entry.name]
             
             # Call the function
-            docs = load_documents(Path("test_dir"))
-            
-            # Assertions
-            assert len(docs) == 2
-            assert docs[0].content == "Test content 1"
-            assert docs[1].content == "Test content 2"
-            assert mock_load.call_count == 2
+            docs = load_documents(FakeDirectory(NOTE_ENTRIES))
+        
+        # Assertions
+        assert docs == [SAMPLE_DOCS['test1.md']]
+    
+    def test_manifest_skips_unchanged_files(self, tmp_path, monkeypatch):
+        """Test that the manifest only reports new or changed files and tracks removals."""
+        
+        monkeypatch.setattr(settings, "NOTES_DIR", tmp_path)
+        note = tmp_path / "note.md"
+        note.write_text("First version")
+        manifest_file = tmp_path / "manifest.json"
+        
+        # First run: the new file is reported and recorded on commit
+        manifest = Manifest(manifest_file)
+        assert manifest.changed_files([note]) == [note]
+        manifest.mark_loaded(note)
+        manifest.commit()
+        
+        # Second run: nothing changed
+        manifest = Manifest(manifest_file)
+        assert manifest.changed_files([note]) == []
+        
+        # Third run: the file was deleted
+        note.unlink()
+        manifest = Manifest(manifest_file)
+        assert manifest.changed_files([]) == []
+        assert manifest.removed == ["note.md"]
+
+@pytest.mark.xdist_group(name="ingest")
+class TestIngestService:
+    """Test cases for the ingestion service."""
+    
+    @pytest.fixture
+    def ingest_env(self, tmp_path, monkeypatch):
+        """Point ingestion at an empty notes directory and a temporary manifest."""
+        notes_dir = tmp_path / "notes"
+        notes_dir.mkdir()
+        monkeypatch.setattr(settings, "NOTES_DIR", notes_dir)
+        monkeypatch.setattr(settings, "MANIFEST_FILE", tmp_path / "manifest.json")
+        
+        indexer = AsyncMock()
+        indexer.index_documents.return_value = 0
+        cache = MagicMock()
+        monkeypatch.setattr('backend.services.ingest.get_indexer', lambda: indexer)
+        monkeypatch.setattr('backend.services.ingest.qa_cache', cache)
+        return SimpleNamespace(manifest_file=settings.MANIFEST_FILE, indexer=indexer, cache=cache)
+    
+    async def test_run_ingestion_clears_answer_cache_on_changes(self, ingest_env):
+        """Test that cached answers are dropped when a note was removed."""
+        ingest_env.manifest_file.write_text(json.dumps({"gone.md": [1, 1]}))
+        
+        # Call the function
+        result = await run_ingestion()
+        
+        # Assertions
+        assert result == {"documents": 0, "chunks": 0, "removed": 1}
+        assert ingest_env.cache.clear.call_count == 1
+    
+    async def test_run_ingestion_keeps_answer_cache_without_changes(self, ingest_env):
+        """Test that cached answers survive a run that changed nothing."""
+        
+        # Call the function
+        result = await run_ingestion()
+        
+        # Assertions
+        assert result == {"documents": 0, "chunks": 0, "removed": 0}
+        ingest_env.cache.clear.assert_not_called()
+    
+    async def test_run_ingestion_deletes_removed_sources(self, ingest_env):
+        """Test that notes deleted from disk are removed from the index and the manifest."""
+        ingest_env.manifest_file.write_text(json.dumps({"gone.md": [1, 1]}))
+        
+        # Call the function
+        await run_ingestion()
+        
+        # Assertions
+        ingest_env.indexer.delete_sources.assert_awaited_once_with(["gone.md"])
+        assert json.loads(ingest_env.manifest_file.read_text()) == {}
+    
+    async def test_run_ingestion_commits_manifest_after_indexing(self, ingest_env):
+        """Test that loaded notes are recorded in the manifest only once indexing succeeds."""
+        (settings.NOTES_DIR / "note.md").write_text("Test content")
+        
+        # Mock indexing failing on the first run
+        ingest_env.indexer.index_documents.side_effect = [RuntimeError("Qdrant is down"), 1]
+        
+        # Call the function: the failed run must not record the note
+        result = await run_ingestion()
+        assert "error" in result
+        assert not ingest_env.manifest_file.exists()
+        
+        # Call the function again: the note is indexed and recorded
+        result = await run_ingestion()
+        assert result == {"documents": 1, "chunks": 1, "removed": 0}
+        assert list(json.loads(ingest_env.manifest_file.read_text())) == ["note.md"]